@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 from .models import (
     Ambulance, Dispatch, AmbulanceType, AmbulanceStation, AmbulanceCrew,
     DispatchCrew, GPSTrackingLog, MaintenanceRecord, EquipmentInventory,
@@ -6,6 +9,24 @@ from .models import (
 )
 
 
+class EstimatedCountPaginator(Paginator):
+    """Paginator that uses the planner's row estimate for unfiltered PostgreSQL tables"""
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if connection.vendor == 'postgresql' and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s",
+                    [self.object_list.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] > 0:
+                return int(row[0])
+        return super().count
+
+
 @admin.register(AmbulanceType)
 class AmbulanceTypeAdmin(admin.ModelAdmin):
     list_display = ('name', 'code', 'is_active', 'created_at')
@@ -23,6 +44,7 @@ class AmbulanceStationAdmin(admin.ModelAdmin):
 @admin.register(Ambulance)
 class AmbulanceAdmin(admin.ModelAdmin):
     list_display = ('license_plate', 'ambulance_type', 'make', 'model', 'status', 'condition', 'patient_capacity')
+    list_select_related = ('ambulance_type',)
     search_fields = ('license_plate', 'make', 'model', 'vehicle_identification_number')
     list_filter = ('status', 'condition', 'ambulance_type', 'home_station', 'is_active')
     readonly_fields = ('id', 'created_at', 'updated_at', 'last_gps_update')
@@ -56,6 +78,7 @@ class AmbulanceAdmin(admin.ModelAdmin):
 @admin.register(Dispatch)
 class DispatchAdmin(admin.ModelAdmin):
     list_display = ('dispatch_number', 'ambulance', 'priority', 'status', 'created_at', 'dispatched_at')
+    list_select_related = ('ambulance__ambulance_type',)
     search_fields = ('dispatch_number', 'ambulance__license_plate', 'pickup_address', 'destination_address')
     list_filter = ('status', 'priority', 'created_at')
     readonly_fields = ('id', 'dispatch_number', 'created_at', 'updated_at', 'response_time_minutes')
@@ -89,6 +112,7 @@ class DispatchAdmin(admin.ModelAdmin):
 @admin.register(AmbulanceCrew)
 class AmbulanceCrewAdmin(admin.ModelAdmin):
     list_display = ('ambulance', 'crew_member', 'role', 'shift_start', 'shift_end', 'is_active')
+    list_select_related = ('ambulance__ambulance_type', 'crew_member')
     search_fields = ('ambulance__license_plate', 'crew_member__username', 'crew_member__first_name', 'crew_member__last_name')
     list_filter = ('role', 'is_active', 'shift_start')
 
@@ -96,14 +120,18 @@ class AmbulanceCrewAdmin(admin.ModelAdmin):
 @admin.register(GPSTrackingLog)
 class GPSTrackingLogAdmin(admin.ModelAdmin):
     list_display = ('ambulance', 'timestamp', 'speed', 'heading', 'accuracy')
+    list_select_related = ('ambulance__ambulance_type',)
     search_fields = ('ambulance__license_plate',)
     list_filter = ('timestamp', 'ambulance')
     readonly_fields = ('timestamp',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
 
 
 @admin.register(MaintenanceRecord)
 class MaintenanceRecordAdmin(admin.ModelAdmin):
     list_display = ('ambulance', 'maintenance_type', 'service_date', 'cost', 'performed_by')
+    list_select_related = ('ambulance__ambulance_type',)
     search_fields = ('ambulance__license_plate', 'performed_by', 'description')
     list_filter = ('maintenance_type', 'service_date')
 
@@ -111,6 +139,7 @@ class MaintenanceRecordAdmin(admin.ModelAdmin):
 @admin.register(EquipmentInventory)
 class EquipmentInventoryAdmin(admin.ModelAdmin):
     list_display = ('ambulance', 'equipment_name', 'quantity', 'condition', 'expiry_date')
+    list_select_related = ('ambulance__ambulance_type',)
     search_fields = ('ambulance__license_plate', 'equipment_name', 'equipment_code')
     list_filter = ('condition', 'category', 'expiry_date')
 
@@ -118,6 +147,7 @@ class EquipmentInventoryAdmin(admin.ModelAdmin):
 @admin.register(FuelLog)
 class FuelLogAdmin(admin.ModelAdmin):
     list_display = ('ambulance', 'created_at', 'fuel_amount', 'cost', 'mileage')
+    list_select_related = ('ambulance__ambulance_type',)
     search_fields = ('ambulance__license_plate', 'fuel_station')
     list_filter = ('created_at',)
 
@@ -125,6 +155,7 @@ class FuelLogAdmin(admin.ModelAdmin):
 @admin.register(IncidentReport)
 class IncidentReportAdmin(admin.ModelAdmin):
     list_display = ('ambulance', 'incident_type', 'severity', 'incident_time', 'reported_by')
+    list_select_related = ('ambulance__ambulance_type', 'reported_by')
     search_fields = ('ambulance__license_plate', 'title', 'description')
     list_filter = ('incident_type', 'severity', 'incident_time', 'injuries', 'property_damage')
 
@@ -132,6 +163,7 @@ class IncidentReportAdmin(admin.ModelAdmin):
 @admin.register(PerformanceMetrics)
 class PerformanceMetricsAdmin(admin.ModelAdmin):
     list_display = ('ambulance', 'date', 'total_dispatches', 'average_response_time', 'fuel_consumed')
+    list_select_related = ('ambulance__ambulance_type',)
     search_fields = ('ambulance__license_plate',)
     list_filter = ('date',)
     readonly_fields = ('date',)
\ No newline at end of file
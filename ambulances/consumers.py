@@ -3,21 +3,99 @@ WebSocket Consumers for Real-time Ambulance Tracking
 Handles GPS updates, dispatch notifications, and emergency communications
 """
 
+import asyncio
 import json
 import logging
+import time
+from functools import cached_property, lru_cache
+from urllib.parse import parse_qs
+
+import orjson
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from django.utils import timezone
-from datetime import datetime
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DurationField, ExpressionWrapper, F
+from django.db.models.functions import Now
+from datetime import datetime, timezone as dt_timezone
 
-from .models import Ambulance, Dispatch, EmergencyCall
-from .services import gps_service, GPSLocation
+from .models import (
+    Ambulance, Dispatch, EmergencyCall, ACTIVE_DISPATCH_STATUSES, OPEN_CALL_STATUSES
+)
+from .services import (
+    gps_service, GPSLocation, ORJSON_OPTIONS, FLEET_STATUS_CACHE_KEY,
+    build_fleet_status_message
+)
 
 logger = logging.getLogger(__name__)
 
 
-class DispatchCenterConsumer(AsyncWebsocketConsumer):
+class OrjsonSendMixin:
+    """Encode outgoing WebSocket payloads with orjson
+
+    orjson serializes datetime and UUID values natively, so payload dicts
+    can carry model values as-is instead of calling isoformat()/str().
+    """
+
+    @cached_property
+    def binary_frames(self):
+        """Clients that connect with ?frames=binary take JSON as binary frames"""
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        return query.get('frames') == ['binary']
+
+    async def send_encoded(self, data):
+        """Send already-encoded UTF-8 JSON without re-encoding it per frame"""
+        if self.binary_frames:
+            await self.send(bytes_data=data)
+        else:
+            await self.send(text_data=data.decode())
+
+    async def send_json(self, content):
+        await self.send_encoded(orjson.dumps(content, option=ORJSON_OPTIONS))
+
+    async def send_event(self, event):
+        """Forward a channel-layer event to the client as {'type', 'data'}
+
+        Producers on hot paths put an already-encoded ``payload`` on the
+        event, which is spliced into a precompiled envelope instead of
+        being decoded and re-encoded for every subscriber.
+        """
+        payload = event.get('payload')
+        if payload is None:
+            await self.send_json({'type': event['type'], 'data': event['message']})
+        else:
+            await self.send_encoded(envelope_prefix(event['type']) + payload + b'}')
+
+
+def parallel_database_sync_to_async(func):
+    """database_sync_to_async for independent read-only queries
+
+    Runs on the shared thread pool instead of the single thread-sensitive
+    executor, so several such queries can be awaited concurrently.
+    """
+    return database_sync_to_async(func, thread_sensitive=False)
+
+
+# [last refresh time, ISO string]; acks only need ~100 ms resolution
+_clock_cache = [0.0, '']
+
+
+def iso_now():
+    """Current UTC time as an ISO-8601 string, reformatted at most 10 times a second"""
+    now = time.time()
+    if now - _clock_cache[0] > 0.1:
+        _clock_cache[:] = [now, datetime.fromtimestamp(now, tz=dt_timezone.utc).isoformat()]
+    return _clock_cache[1]
+
+
+@lru_cache(maxsize=None)
+def envelope_prefix(message_type):
+    """Encoded '{"type":...,"data":' prefix for an outgoing event envelope"""
+    return b'{"type":' + orjson.dumps(message_type) + b',"data":'
+
+
+class DispatchCenterConsumer(OrjsonSendMixin, AsyncWebsocketConsumer):
     """WebSocket consumer for dispatch center real-time updates"""
     
     async def connect(self):
@@ -61,10 +139,10 @@ class DispatchCenterConsumer(AsyncWebsocketConsumer):
             message_type = data.get('type')
             
             if message_type == 'ping':
-                await self.send(text_data=json.dumps({
+                await self.send_json({
                     'type': 'pong',
-                    'timestamp': timezone.now().isoformat()
-                }))
+                    'timestamp': iso_now()
+                })
             
             elif message_type == 'request_ambulance_status':
                 await self.send_ambulance_status()
@@ -83,140 +161,119 @@ class DispatchCenterConsumer(AsyncWebsocketConsumer):
     # Message handlers
     async def ambulance_location_update(self, event):
         """Handle ambulance location updates"""
-        await self.send(text_data=json.dumps({
-            'type': 'ambulance_location_update',
-            'data': event['message']
-        }))
+        await self.send_event(event)
     
     async def emergency_call_created(self, event):
         """Handle new emergency call notifications"""
-        await self.send(text_data=json.dumps({
-            'type': 'emergency_call_created',
-            'data': event['message']
-        }))
+        await self.send_event(event)
     
     async def dispatch_status_changed(self, event):
         """Handle dispatch status changes"""
-        await self.send(text_data=json.dumps({
-            'type': 'dispatch_status_changed',
-            'data': event['message']
-        }))
+        await self.send_event(event)
+    
+    async def fleet_status_snapshot(self, event):
+        """Forward the pre-encoded fleet snapshot pushed by the periodic task"""
+        await self.send_encoded(event['payload'])
     
     async def hospital_capacity_update(self, event):
         """Handle hospital capacity updates"""
-        await self.send(text_data=json.dumps({
-            'type': 'hospital_capacity_update',
-            'data': event['message']
-        }))
+        await self.send_event(event)
     
     # Helper methods
     @database_sync_to_async
     def is_dispatcher(self):
         """Check if user is a dispatcher"""
         user = self.scope["user"]
-        return (user.role in ['DISPATCHER', 'ADMIN'] or 
+        return (user.role in ['DISPATCHER', 'ADMIN'] or
                 user.is_superuser or
                 user.groups.filter(name='Dispatchers').exists())
     
     async def send_initial_data(self):
         """Send initial data when dispatcher connects"""
         try:
-            # Send ambulance status
-            await self.send_ambulance_status()
-            
-            # Send active calls
-            await self.send_active_calls()
-            
-            # Send active dispatches
-            await self.send_active_dispatches()
+            # The three snapshots are independent reads, so fetch them concurrently
+            await asyncio.gather(
+                self.send_ambulance_status(),
+                self.send_active_calls(),
+                self.send_active_dispatches()
+            )
             
         except Exception as e:
             logger.error(f"Error sending initial data: {str(e)}")
     
     async def send_ambulance_status(self):
         """Send current ambulance status"""
-        ambulances = await self.get_ambulance_data()
-        await self.send(text_data=json.dumps({
-            'type': 'ambulance_status',
-            'data': ambulances
-        }))
+        message = await cache.aget(FLEET_STATUS_CACHE_KEY)
+        if message is None:
+            message = await parallel_database_sync_to_async(build_fleet_status_message)()
+        await self.send_encoded(message)
     
     async def send_active_calls(self):
         """Send active emergency calls"""
         calls = await self.get_emergency_calls()
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'active_calls',
             'data': calls
-        }))
+        })
     
     async def send_active_dispatches(self):
         """Send active dispatches"""
         dispatches = await self.get_active_dispatches()
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'active_dispatches',
             'data': dispatches
-        }))
+        })
     
-    @database_sync_to_async
-    def get_ambulance_data(self):
-        """Get ambulance data for dispatch center"""
-        ambulances = []
-        for ambulance in Ambulance.objects.filter(is_active=True):
-            ambulances.append({
-                'id': str(ambulance.id),
-                'license_plate': ambulance.license_plate,
-                'status': ambulance.status,
-                'location': {
-                    'latitude': ambulance.current_latitude,
-                    'longitude': ambulance.current_longitude
-                } if ambulance.current_latitude and ambulance.current_longitude else None,
-                'last_update': ambulance.last_gps_update.isoformat() if ambulance.last_gps_update else None,
-                'crew_count': ambulance.assigned_crew.count(),
-                'ambulance_type': ambulance.ambulance_type.name
-            })
-        return ambulances
-    
-    @database_sync_to_async
+    @parallel_database_sync_to_async
     def get_emergency_calls(self):
         """Get active emergency calls"""
-        calls = []
-        for call in EmergencyCall.objects.filter(status__in=['received', 'processing']).order_by('-received_at'):
-            calls.append({
-                'id': str(call.id),
-                'call_number': call.call_number,
-                'call_type': call.call_type,
-                'priority': call.priority,
-                'incident_address': call.incident_address,
-                'patient_name': call.patient_name,
-                'caller_name': call.caller_name,
-                'received_at': call.received_at.isoformat(),
-                'elapsed_time': (timezone.now() - call.received_at).total_seconds() / 60
-            })
-        return calls
+        rows = EmergencyCall.objects.filter(status__in=OPEN_CALL_STATUSES).annotate(
+            elapsed=ExpressionWrapper(Now() - F('received_at'), output_field=DurationField())
+        ).order_by('-received_at').values(
+            'id', 'call_number', 'call_type', 'priority', 'incident_address',
+            'patient_name', 'caller_name', 'received_at', 'elapsed'
+        )
+        return [
+            {
+                'id': row['id'],
+                'call_number': row['call_number'],
+                'call_type': row['call_type'],
+                'priority': row['priority'],
+                'incident_address': row['incident_address'],
+                'patient_name': row['patient_name'],
+                'caller_name': row['caller_name'],
+                'received_at': row['received_at'],
+                'elapsed_time': row['elapsed'].total_seconds() / 60
+            }
+            for row in rows
+        ]
     
-    @database_sync_to_async
+    @parallel_database_sync_to_async
     def get_active_dispatches(self):
         """Get active dispatches"""
-        dispatches = []
-        for dispatch in Dispatch.objects.filter(status__in=[
-            'dispatched', 'en_route_pickup', 'on_scene', 'patient_loaded', 'en_route_hospital'
-        ]).select_related('ambulance', 'referral'):
-            dispatches.append({
-                'id': str(dispatch.id),
-                'dispatch_number': dispatch.dispatch_number,
+        rows = Dispatch.objects.filter(status__in=ACTIVE_DISPATCH_STATUSES).values(
+            'id', 'dispatch_number', 'status', 'priority', 'pickup_address',
+            'destination_address', 'created_at', 'estimated_pickup_time',
+            'estimated_arrival_time', 'ambulance_id', 'ambulance__license_plate'
+        )
+        return [
+            {
+                'id': row['id'],
+                'dispatch_number': row['dispatch_number'],
                 'ambulance': {
-                    'id': str(dispatch.ambulance.id),
-                    'license_plate': dispatch.ambulance.license_plate
+                    'id': row['ambulance_id'],
+                    'license_plate': row['ambulance__license_plate']
                 },
-                'status': dispatch.status,
-                'priority': dispatch.priority,
-                'pickup_address': dispatch.pickup_address,
-                'destination_address': dispatch.destination_address,
-                'created_at': dispatch.created_at.isoformat(),
-                'estimated_pickup_time': dispatch.estimated_pickup_time.isoformat() if dispatch.estimated_pickup_time else None,
-                'estimated_arrival_time': dispatch.estimated_arrival_time.isoformat() if dispatch.estimated_arrival_time else None
-            })
-        return dispatches
+                'status': row['status'],
+                'priority': row['priority'],
+                'pickup_address': row['pickup_address'],
+                'destination_address': row['destination_address'],
+                'created_at': row['created_at'],
+                'estimated_pickup_time': row['estimated_pickup_time'],
+                'estimated_arrival_time': row['estimated_arrival_time']
+            }
+            for row in rows
+        ]
     
     async def handle_dispatch_status_update(self, data):
         """Handle dispatch status update from dispatcher"""
@@ -244,14 +301,14 @@ class DispatchCenterConsumer(AsyncWebsocketConsumer):
                 'old_status': old_status,
                 'new_status': new_status,
                 'updated_by': self.scope["user"].username,
-                'timestamp': timezone.now().isoformat()
+                'timestamp': iso_now()
             }
         except Dispatch.DoesNotExist:
             logger.error(f"Dispatch {dispatch_id} not found")
             return None
 
 
-class AmbulanceConsumer(AsyncWebsocketConsumer):
+class AmbulanceConsumer(OrjsonSendMixin, AsyncWebsocketConsumer):
     """WebSocket consumer for ambulance crews"""
     
     async def connect(self):
@@ -314,37 +371,26 @@ class AmbulanceConsumer(AsyncWebsocketConsumer):
     # Message handlers
     async def gps_location_update(self, event):
         """Send GPS location update to ambulance crew"""
-        await self.send(text_data=json.dumps({
-            'type': 'gps_location_update',
-            'data': event['message']
-        }))
+        await self.send_event(event)
     
     async def dispatch_assigned(self, event):
         """Handle new dispatch assignment"""
-        await self.send(text_data=json.dumps({
-            'type': 'dispatch_assigned',
-            'data': event['message']
-        }))
+        await self.send_event(event)
     
     async def dispatch_updated(self, event):
         """Handle dispatch updates"""
-        await self.send(text_data=json.dumps({
-            'type': 'dispatch_updated',
-            'data': event['message']
-        }))
+        await self.send_event(event)
     
     # Helper methods
     @database_sync_to_async
     def is_ambulance_crew(self):
         """Check if user is assigned to this ambulance"""
         user = self.scope["user"]
-        try:
-            ambulance = Ambulance.objects.get(id=self.ambulance_id)
-            return (user in ambulance.assigned_crew.all() or 
-                    user.role in ['ADMIN', 'DISPATCHER'] or
-                    user.is_superuser)
-        except Ambulance.DoesNotExist:
-            return False
+        ambulances = Ambulance.objects.filter(id=self.ambulance_id)
+        # Staff only need the ambulance to exist; crew must be assigned to it
+        if not (user.role in ['ADMIN', 'DISPATCHER'] or user.is_superuser):
+            ambulances = ambulances.filter(assigned_crew=user)
+        return ambulances.exists()
     
     async def handle_gps_update(self, data):
         """Handle GPS location update from ambulance"""
@@ -363,22 +409,22 @@ class AmbulanceConsumer(AsyncWebsocketConsumer):
             success = await gps_service.update_ambulance_location(self.ambulance_id, location)
             
             if success:
-                await self.send(text_data=json.dumps({
+                await self.send_json({
                     'type': 'gps_update_confirmed',
-                    'timestamp': timezone.now().isoformat()
-                }))
+                    'timestamp': iso_now()
+                })
             else:
-                await self.send(text_data=json.dumps({
+                await self.send_json({
                     'type': 'gps_update_failed',
                     'error': 'Failed to update GPS location'
-                }))
+                })
                 
         except (ValueError, KeyError) as e:
             logger.error(f"Invalid GPS data: {str(e)}")
-            await self.send(text_data=json.dumps({
+            await self.send_json({
                 'type': 'gps_update_failed',
                 'error': 'Invalid GPS data format'
-            }))
+            })
     
     async def handle_status_update(self, data):
         """Handle ambulance status update"""
@@ -393,53 +439,57 @@ class AmbulanceConsumer(AsyncWebsocketConsumer):
     @database_sync_to_async
     def update_ambulance_status(self, new_status):
         """Update ambulance status in database"""
-        try:
-            ambulance = Ambulance.objects.get(id=self.ambulance_id)
-            old_status = ambulance.status
-            ambulance.status = new_status
-            ambulance.save(update_fields=['status'])
-            
-            return {
-                'ambulance_id': str(ambulance.id),
-                'old_status': old_status,
-                'new_status': new_status,
-                'updated_by': self.scope["user"].username,
-                'timestamp': timezone.now().isoformat()
-            }
-        except Ambulance.DoesNotExist:
+        # Lock the row so the returned old status is the one this update replaced
+        with transaction.atomic():
+            old_status = Ambulance.objects.select_for_update().filter(
+                id=self.ambulance_id
+            ).values_list('status', flat=True).first()
+            if old_status is not None:
+                Ambulance.objects.filter(id=self.ambulance_id).update(status=new_status)
+        
+        if old_status is None:
             logger.error(f"Ambulance {self.ambulance_id} not found")
             return None
+        
+        return {
+            'ambulance_id': str(self.ambulance_id),
+            'old_status': old_status,
+            'new_status': new_status,
+            'updated_by': self.scope["user"].username,
+            'timestamp': iso_now()
+        }
     
     async def send_current_dispatch(self):
         """Send current dispatch information to ambulance crew"""
         dispatch_data = await self.get_current_dispatch()
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'current_dispatch',
             'data': dispatch_data
-        }))
+        })
     
     @database_sync_to_async
     def get_current_dispatch(self):
         """Get current dispatch for this ambulance"""
-        try:
-            ambulance = Ambulance.objects.get(id=self.ambulance_id)
-            dispatch = ambulance.dispatches.filter(status__in=[
-                'dispatched', 'en_route_pickup', 'on_scene', 'patient_loaded', 'en_route_hospital'
-            ]).first()
-            
-            if dispatch:
-                return {
-                    'id': str(dispatch.id),
-                    'dispatch_number': dispatch.dispatch_number,
-                    'status': dispatch.status,
-                    'priority': dispatch.priority,
-                    'pickup_address': dispatch.pickup_address,
-                    'destination_address': dispatch.destination_address,
-                    'patient_condition': dispatch.patient_condition,
-                    'special_instructions': dispatch.special_instructions,
-                    'estimated_pickup_time': dispatch.estimated_pickup_time.isoformat() if dispatch.estimated_pickup_time else None,
-                    'estimated_arrival_time': dispatch.estimated_arrival_time.isoformat() if dispatch.estimated_arrival_time else None
-                }
-            return None
-        except Ambulance.DoesNotExist:
-            return None
\ No newline at end of file
+        dispatch = Dispatch.objects.filter(
+            ambulance_id=self.ambulance_id,
+            status__in=ACTIVE_DISPATCH_STATUSES
+        ).only(
+            'id', 'dispatch_number', 'status', 'priority', 'pickup_address',
+            'destination_address', 'patient_condition', 'special_instructions',
+            'estimated_pickup_time', 'estimated_arrival_time'
+        ).first()
+        
+        if dispatch:
+            return {
+                'id': dispatch.id,
+                'dispatch_number': dispatch.dispatch_number,
+                'status': dispatch.status,
+                'priority': dispatch.priority,
+                'pickup_address': dispatch.pickup_address,
+                'destination_address': dispatch.destination_address,
+                'patient_condition': dispatch.patient_condition,
+                'special_instructions': dispatch.special_instructions,
+                'estimated_pickup_time': dispatch.estimated_pickup_time,
+                'estimated_arrival_time': dispatch.estimated_arrival_time
+            }
+        return None
\ No newline at end of file
@@ -1,12 +1,64 @@
+import math
+import uuid
+
 from django import forms
-from django.core.validators import RegexValidator
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from .models import (
-    Ambulance, Dispatch, AmbulanceType, AmbulanceStation,
-    MaintenanceRecord, EquipmentInventory, FuelLog, IncidentReport
+    Ambulance, Dispatch, AmbulanceType, AmbulanceStation, MaintenanceRecord,
+    ACTIVE_AMBULANCE_TYPES_CACHE_KEY, ACTIVE_STATIONS_CACHE_KEY, ACTIVE_AMBULANCES_CACHE_KEY
 )
-from referrals.models import Referral
-from users.models import User
+
+# Tailwind classes shared by every input widget
+INPUT_CLASS = 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+
+# Seconds the active type/station option lists are reused between renders
+CHOICES_CACHE_TIMEOUT = 60
+
+
+def _get_active_types():
+    """(pk, label) options for active ambulance types, cached"""
+    return cache.get_or_set(
+        ACTIVE_AMBULANCE_TYPES_CACHE_KEY,
+        lambda: [(str(t.pk), str(t)) for t in AmbulanceType.active.only('id', 'name')],
+        CHOICES_CACHE_TIMEOUT
+    )
+
+
+def _get_active_stations():
+    """(pk, label) options for active ambulance stations, cached"""
+    return cache.get_or_set(
+        ACTIVE_STATIONS_CACHE_KEY,
+        lambda: [(str(s.pk), str(s)) for s in AmbulanceStation.active.only('id', 'name', 'code')],
+        CHOICES_CACHE_TIMEOUT
+    )
+
+
+def _active_ambulances():
+    # Option labels only need the plate and type name, not every ambulance column
+    return (
+        Ambulance.objects.filter(is_active=True)
+        .select_related('ambulance_type')
+        .only('id', 'license_plate', 'ambulance_type__name')
+        .order_by('license_plate')
+    )
+
+
+def _get_active_ambulances():
+    """(pk, label) options for active ambulances, cached"""
+    return cache.get_or_set(
+        ACTIVE_AMBULANCES_CACHE_KEY,
+        lambda: [(str(a.pk), str(a)) for a in _active_ambulances()],
+        CHOICES_CACHE_TIMEOUT
+    )
+
+
+def _with_empty_label(field, options):
+    if field.empty_label is None:
+        return options
+    return [('', field.empty_label)] + options
+
 
 class AmbulanceForm(forms.ModelForm):
     class Meta:
@@ -18,67 +70,70 @@ class AmbulanceForm(forms.ModelForm):
         ]
         widgets = {
             'license_plate': forms.TextInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'placeholder': 'Enter license plate number'
             }),
             'vehicle_identification_number': forms.TextInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'placeholder': '17-character VIN'
             }),
             'ambulance_type': forms.Select(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+                'class': INPUT_CLASS
             }),
             'make': forms.TextInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+                'class': INPUT_CLASS
             }),
             'model': forms.TextInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+                'class': INPUT_CLASS
             }),
             'year': forms.NumberInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'min': 1990,
                 'max': 2030
             }),
             'color': forms.TextInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+                'class': INPUT_CLASS
             }),
             'patient_capacity': forms.NumberInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'min': 1,
                 'max': 10
             }),
             'crew_capacity': forms.NumberInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'min': 1,
                 'max': 6
             }),
             'medical_equipment': forms.Textarea(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'rows': 4,
                 'placeholder': 'List available medical equipment'
             }),
             'condition': forms.Select(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+                'class': INPUT_CLASS
             }),
             'fuel_level': forms.NumberInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'min': 0,
                 'max': 100
             }),
             'home_station': forms.Select(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+                'class': INPUT_CLASS
             })
         }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filter active ambulance types and stations
-        try:
-            self.fields['ambulance_type'].queryset = AmbulanceType.objects.filter(is_active=True)
-            self.fields['home_station'].queryset = AmbulanceStation.objects.filter(is_active=True)
-        except:
-            # Handle case where models don't exist yet during migrations
-            pass
+        # Render options from the cached lists; the querysets are only hit to validate a submit
+        self.fields['ambulance_type'].choices = _with_empty_label(self.fields['ambulance_type'], _get_active_types())
+        self.fields['home_station'].choices = _with_empty_label(self.fields['home_station'], _get_active_stations())
+
+
+# Querysets are lazy, so the active filters are set once on the class and
+# every form instance gets its own copy when base_fields is deep-copied
+AmbulanceForm.base_fields['ambulance_type'].queryset = AmbulanceType.active.only('id', 'name')
+AmbulanceForm.base_fields['home_station'].queryset = AmbulanceStation.active.only('id', 'name', 'code')
+
 
 class DispatchForm(forms.ModelForm):
     pickup_latitude = forms.FloatField(widget=forms.HiddenInput(), required=False)
@@ -94,75 +149,63 @@ class DispatchForm(forms.ModelForm):
         ]
         widgets = {
             'priority': forms.Select(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+                'class': INPUT_CLASS
             }),
             'pickup_address': forms.Textarea(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'rows': 2,
                 'placeholder': 'Enter pickup address'
             }),
             'destination_address': forms.Textarea(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'rows': 2,
                 'placeholder': 'Enter destination address'
             }),
             'patient_condition': forms.Textarea(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'rows': 3,
                 'placeholder': 'Describe patient condition'
             }),
             'special_instructions': forms.Textarea(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'rows': 3,
                 'placeholder': 'Any special instructions'
             }),
             'contact_person': forms.TextInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'placeholder': 'Contact person name'
             }),
             'contact_phone': forms.TextInput(attrs={
-                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'class': INPUT_CLASS,
                 'placeholder': 'Contact phone number'
             })
         }
 
+# Search filters reuse the model choices so the two lists cannot drift
+_STATUS_FILTER_CHOICES = (('', 'All Statuses'), *Ambulance.STATUS_CHOICES)
+_CONDITION_FILTER_CHOICES = (('', 'All Conditions'), *Ambulance.CONDITION_CHOICES)
+
+
 class AmbulanceSearchForm(forms.Form):
     search = forms.CharField(
         required=False,
         widget=forms.TextInput(attrs={
-            'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500',
+            'class': INPUT_CLASS,
             'placeholder': 'Search by license plate, make, model...'
         })
     )
     status = forms.ChoiceField(
         required=False,
-        choices=[('', 'All Statuses')] + [
-            ('available', 'Available'),
-            ('dispatched', 'Dispatched'),
-            ('en_route', 'En Route'),
-            ('on_scene', 'On Scene'),
-            ('transporting', 'Transporting'),
-            ('at_hospital', 'At Hospital'),
-            ('returning', 'Returning'),
-            ('out_of_service', 'Out of Service'),
-            ('maintenance', 'Under Maintenance'),
-            ('offline', 'Offline'),
-        ],
+        choices=_STATUS_FILTER_CHOICES,
         widget=forms.Select(attrs={
-            'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+            'class': INPUT_CLASS
         })
     )
     condition = forms.ChoiceField(
         required=False,
-        choices=[('', 'All Conditions')] + [
-            ('excellent', 'Excellent'),
-            ('good', 'Good'),
-            ('fair', 'Fair'),
-            ('poor', 'Poor'),
-            ('critical', 'Critical'),
-        ],
+        choices=_CONDITION_FILTER_CHOICES,
         widget=forms.Select(attrs={
-            'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'
+            'class': INPUT_CLASS
         })
     )
 
@@ -177,6 +220,44 @@ class GPSUpdateForm(forms.Form):
     accuracy = forms.FloatField(min_value=0, required=False)
 
 
+# (field, minimum, maximum, required) for the numeric GPSUpdateForm fields
+_GPS_FIELD_BOUNDS = (
+    ('latitude', -90, 90, True),
+    ('longitude', -180, 180, True),
+    ('speed', 0, None, False),
+    ('heading', 0, 360, False),
+    ('accuracy', 0, None, False),
+)
+
+
+def validate_gps_payload(data):
+    """Validate a GPS ping like GPSUpdateForm, without the form machinery
+
+    Returns the cleaned values (missing optional fields are None) or raises
+    a ValidationError keyed by the first offending field.
+    """
+    try:
+        cleaned = {'ambulance_id': uuid.UUID(str(data.get('ambulance_id')))}
+    except ValueError:
+        raise ValidationError({'ambulance_id': _('Enter a valid UUID.')})
+
+    for name, minimum, maximum, required in _GPS_FIELD_BOUNDS:
+        value = data.get(name)
+        if value is None or value == '':
+            if required:
+                raise ValidationError({name: _('This field is required.')})
+            cleaned[name] = None
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValidationError({name: _('Enter a number.')})
+        if not math.isfinite(value) or value < minimum or (maximum is not None and value > maximum):
+            raise ValidationError({name: _('Value out of range.')})
+        cleaned[name] = value
+    return cleaned
+
+
 class MaintenanceForm(forms.ModelForm):
     """Form for recording maintenance activities"""
 
@@ -187,13 +268,20 @@ class MaintenanceForm(forms.ModelForm):
             'cost', 'mileage_at_service', 'next_service_mileage', 'service_date', 'next_service_date'
         ]
         widgets = {
-            'ambulance': forms.Select(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'}),
-            'maintenance_type': forms.Select(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'}),
-            'description': forms.Textarea(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'rows': 4}),
-            'performed_by': forms.TextInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'}),
-            'cost': forms.NumberInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'step': '0.01'}),
-            'mileage_at_service': forms.NumberInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'}),
-            'next_service_mileage': forms.NumberInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500'}),
-            'service_date': forms.DateTimeInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'type': 'datetime-local'}),
-            'next_service_date': forms.DateTimeInput(attrs={'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500', 'type': 'datetime-local'}),
-        }
\ No newline at end of file
+            'ambulance': forms.Select(attrs={'class': INPUT_CLASS}),
+            'maintenance_type': forms.Select(attrs={'class': INPUT_CLASS}),
+            'description': forms.Textarea(attrs={'class': INPUT_CLASS, 'rows': 4}),
+            'performed_by': forms.TextInput(attrs={'class': INPUT_CLASS}),
+            'cost': forms.NumberInput(attrs={'class': INPUT_CLASS, 'step': '0.01'}),
+            'mileage_at_service': forms.NumberInput(attrs={'class': INPUT_CLASS}),
+            'next_service_mileage': forms.NumberInput(attrs={'class': INPUT_CLASS}),
+            'service_date': forms.DateTimeInput(attrs={'class': INPUT_CLASS, 'type': 'datetime-local'}),
+            'next_service_date': forms.DateTimeInput(attrs={'class': INPUT_CLASS, 'type': 'datetime-local'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['ambulance'].choices = _with_empty_label(self.fields['ambulance'], _get_active_ambulances())
+
+
+MaintenanceForm.base_fields['ambulance'].queryset = _active_ambulances()
@@ -3,13 +3,43 @@ Emergency Call Management Forms
 Professional forms for emergency call intake and management
 """
 
+import re
+
 from django import forms
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
-# GIS functionality removed - using standard latitude/longitude fields instead
 
 from .models import EmergencyCall, CallPriorityAssessment
 
+# Tailwind classes shared by the intake widgets
+INPUT_CLASS = 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200'
+QUICK_INPUT_CLASS = 'w-full px-4 py-3 border-2 border-red-300 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200'
+CHECKBOX_CLASS = 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
+
+# Widgets copy attrs on init, so every checkbox can share this dict
+_CHECKBOX_ATTRS = {'class': CHECKBOX_CLASS}
+
+# Call types that default the priority field
+_EMERGENCY_CALL_TYPES = frozenset({'cardiac', 'respiratory', 'trauma'})
+_URGENT_CALL_TYPES = frozenset({'medical', 'psychiatric'})
+
+_PRIORITY_CHOICES = tuple(EmergencyCall.PRIORITY_CHOICES)
+
+# Caller phone normalisation and format check
+_NONDIGIT_RE = re.compile(r'[^\d+]')
+_PHONE_RE = re.compile(r'^\+?1?\d{9,15}$')
+
+
+def _clean_phone_number(phone):
+    """Normalise a caller phone number, raising ValidationError if invalid"""
+    if phone:
+        # Remove all non-digit characters except +
+        cleaned_phone = _NONDIGIT_RE.sub('', phone)
+        if not _PHONE_RE.match(cleaned_phone):
+            raise ValidationError('Please enter a valid phone number.')
+        return cleaned_phone
+    return phone
+
 
 class EmergencyCallForm(forms.ModelForm):
     """Comprehensive emergency call intake form"""
@@ -28,104 +58,98 @@ class EmergencyCallForm(forms.ModelForm):
         
         widgets = {
             'caller_phone': forms.TextInput(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Enter caller phone number (e.g., +1-555-123-4567)',
                 'pattern': r'^\+?1?\d{9,15}$'
             }),
             'caller_name': forms.TextInput(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Enter caller full name'
             }),
             'caller_relationship': forms.TextInput(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Relationship to patient (e.g., spouse, parent, self)'
             }),
             'call_type': forms.Select(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200'
+                'class': INPUT_CLASS
             }),
             'priority': forms.Select(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200'
+                'class': INPUT_CLASS
             }),
             'incident_address': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Enter complete incident address with apartment/unit number',
                 'rows': 3
             }),
             'landmark_description': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Nearby landmarks, cross streets, or identifying features',
                 'rows': 2
             }),
             'access_instructions': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Special access instructions (gate codes, elevator, etc.)',
                 'rows': 2
             }),
             'patient_name': forms.TextInput(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Patient full name'
             }),
             'patient_age': forms.NumberInput(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Patient age in years',
                 'min': 0,
                 'max': 150
             }),
             'patient_gender': forms.Select(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200'
+                'class': INPUT_CLASS
             }),
             'patient_consciousness': forms.Select(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200'
+                'class': INPUT_CLASS
             }),
             'patient_breathing': forms.Select(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200'
+                'class': INPUT_CLASS
             }),
             'chief_complaint': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Primary reason for emergency call (what happened?)',
                 'rows': 3
             }),
             'symptoms_description': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Detailed description of symptoms and current condition',
                 'rows': 4
             }),
             'medical_history': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Relevant medical history, chronic conditions, recent surgeries',
                 'rows': 3
             }),
             'medications': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Current medications and dosages',
                 'rows': 3
             }),
             'allergies': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Known allergies to medications, foods, or other substances',
                 'rows': 2
             }),
             'special_instructions': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Special instructions for responding crew',
                 'rows': 3
             }),
-            'hazards_present': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
+            'hazards_present': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
             'hazard_description': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Describe any hazards present at the scene',
                 'rows': 2
             }),
-            'police_required': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'fire_required': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
+            'police_required': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'fire_required': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
             'call_notes': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Additional notes about the call',
                 'rows': 4
             }),
@@ -157,40 +181,26 @@ class EmergencyCallForm(forms.ModelForm):
             'fire_required': _('Fire Department Required'),
             'call_notes': _('Call Notes'),
         }
+        
+        help_texts = {
+            'caller_phone': _('Include country code if international'),
+            'patient_age': _('Enter age in years (0-150)'),
+            'chief_complaint': _('Brief description of the primary emergency'),
+        }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Make certain fields required
-        self.fields['caller_phone'].required = True
-        self.fields['call_type'].required = True
-        self.fields['priority'].required = True
-        self.fields['incident_address'].required = True
-        self.fields['chief_complaint'].required = True
-        
-        # Add help text
-        self.fields['caller_phone'].help_text = 'Include country code if international'
-        self.fields['patient_age'].help_text = 'Enter age in years (0-150)'
-        self.fields['chief_complaint'].help_text = 'Brief description of the primary emergency'
-        
         # Set initial priority based on call type
-        if 'call_type' in self.data:
+        if self.is_bound:
             call_type = self.data.get('call_type')
-            if call_type in ['cardiac', 'respiratory', 'trauma']:
+            if call_type in _EMERGENCY_CALL_TYPES:
                 self.fields['priority'].initial = 'emergency'
-            elif call_type in ['medical', 'psychiatric']:
+            elif call_type in _URGENT_CALL_TYPES:
                 self.fields['priority'].initial = 'urgent'
     
     def clean_caller_phone(self):
-        phone = self.cleaned_data.get('caller_phone')
-        if phone:
-            # Remove all non-digit characters except +
-            import re
-            cleaned_phone = re.sub(r'[^\d+]', '', phone)
-            if not re.match(r'^\+?1?\d{9,15}$', cleaned_phone):
-                raise ValidationError('Please enter a valid phone number.')
-            return cleaned_phone
-        return phone
+        return _clean_phone_number(self.cleaned_data.get('caller_phone'))
     
     def clean_patient_age(self):
         age = self.cleaned_data.get('patient_age')
@@ -202,13 +212,8 @@ class EmergencyCallForm(forms.ModelForm):
         cleaned_data = super().clean()
         
         # If hazards are present, description is required
-        hazards_present = cleaned_data.get('hazards_present')
-        hazard_description = cleaned_data.get('hazard_description')
-        
-        if hazards_present and not hazard_description:
-            raise ValidationError({
-                'hazard_description': 'Please describe the hazards present at the scene.'
-            })
+        if cleaned_data.get('hazards_present') and not cleaned_data.get('hazard_description'):
+            self.add_error('hazard_description', 'Please describe the hazards present at the scene.')
         
         return cleaned_data
 
@@ -225,38 +230,18 @@ class CallPriorityAssessmentForm(forms.ModelForm):
         ]
         
         widgets = {
-            'chest_pain': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'difficulty_breathing': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'unconscious': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'severe_bleeding': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'cardiac_arrest': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'stroke_symptoms': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'severe_trauma': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'overdose': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'allergic_reaction': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
-            'pregnancy_complications': forms.CheckboxInput(attrs={
-                'class': 'w-5 h-5 text-red-600 border-2 border-gray-300 rounded focus:ring-red-500'
-            }),
+            'chest_pain': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'difficulty_breathing': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'unconscious': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'severe_bleeding': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'cardiac_arrest': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'stroke_symptoms': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'severe_trauma': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'overdose': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'allergic_reaction': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
+            'pregnancy_complications': forms.CheckboxInput(attrs=_CHECKBOX_ATTRS),
             'assessment_notes': forms.Textarea(attrs={
-                'class': 'w-full px-4 py-3 border-2 border-gray-200 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+                'class': INPUT_CLASS,
                 'placeholder': 'Additional assessment notes and observations',
                 'rows': 4
             }),
@@ -283,7 +268,7 @@ class QuickCallForm(forms.Form):
     caller_phone = forms.CharField(
         max_length=20,
         widget=forms.TextInput(attrs={
-            'class': 'w-full px-4 py-3 border-2 border-red-300 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+            'class': QUICK_INPUT_CLASS,
             'placeholder': 'Caller phone number',
             'autofocus': True
         }),
@@ -292,7 +277,7 @@ class QuickCallForm(forms.Form):
     
     incident_address = forms.CharField(
         widget=forms.Textarea(attrs={
-            'class': 'w-full px-4 py-3 border-2 border-red-300 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+            'class': QUICK_INPUT_CLASS,
             'placeholder': 'Incident address',
             'rows': 2
         }),
@@ -301,7 +286,7 @@ class QuickCallForm(forms.Form):
     
     chief_complaint = forms.CharField(
         widget=forms.Textarea(attrs={
-            'class': 'w-full px-4 py-3 border-2 border-red-300 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200',
+            'class': QUICK_INPUT_CLASS,
             'placeholder': 'What is the emergency?',
             'rows': 3
         }),
@@ -309,20 +294,13 @@ class QuickCallForm(forms.Form):
     )
     
     priority = forms.ChoiceField(
-        choices=EmergencyCall.PRIORITY_CHOICES,
+        choices=_PRIORITY_CHOICES,
         widget=forms.Select(attrs={
-            'class': 'w-full px-4 py-3 border-2 border-red-300 rounded-lg focus:ring-2 focus:ring-red-500 focus:border-red-500 transition duration-200'
+            'class': QUICK_INPUT_CLASS
         }),
         label=_('Priority Level *'),
         initial='emergency'
     )
     
     def clean_caller_phone(self):
-        phone = self.cleaned_data.get('caller_phone')
-        if phone:
-            import re
-            cleaned_phone = re.sub(r'[^\d+]', '', phone)
-            if not re.match(r'^\+?1?\d{9,15}$', cleaned_phone):
-                raise ValidationError('Please enter a valid phone number.')
-            return cleaned_phone
-        return phone
+        return _clean_phone_number(self.cleaned_data.get('caller_phone'))
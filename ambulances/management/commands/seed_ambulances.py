@@ -1,18 +1,108 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, connections, transaction
 from django.utils import timezone
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+import csv
 from datetime import datetime, timedelta
+from itertools import cycle, product
+import io
+import os
 import random
 from decimal import Decimal
 
+from ambulances.management.seeding import (
+    CACHE_RECEIVERS, CLEARED_MODELS, DEFAULT_BATCH_SIZE, SEEDED_MODELS,
+    clear_models, muted_cache_receivers
+)
 from ambulances.models import (
     Ambulance, AmbulanceType, AmbulanceStation, AmbulanceCrew,
     Dispatch, GPSTrackingLog, MaintenanceRecord, EquipmentInventory,
     FuelLog, IncidentReport, PerformanceMetrics
 )
+from referrals.models import Referral
+from users.models import Profile
 
 User = get_user_model()
 
+# Login password for seeded crew accounts, matching the seed_database users
+SEED_PASSWORD = 'password123'
+
+GPS_LOGS_PER_AMBULANCE = 5
+
+DISPATCH_COUNT = 10
+
+# Values drawn for the random choice columns
+AMBULANCE_COLORS = ('White', 'Yellow', 'Red', 'Blue')
+AMBULANCE_STATUSES = ('available', 'dispatched', 'maintenance')
+AMBULANCE_CONDITIONS = ('excellent', 'good', 'fair')
+DISPATCH_PRIORITIES = ('routine', 'urgent', 'emergency')
+DISPATCH_STATUSES = (
+    'requested', 'dispatched', 'en_route_pickup', 'on_scene',
+    'patient_loaded', 'en_route_hospital', 'at_hospital', 'completed'
+)
+MAINTENANCE_TYPES = ('routine', 'repair', 'inspection', 'emergency')
+EQUIPMENT_CONDITIONS = ('excellent', 'good', 'fair', 'poor')
+INCIDENT_TYPES = ('medical', 'accident', 'equipment', 'other')
+INCIDENT_SEVERITIES = ('minor', 'moderate', 'major', 'critical')
+
+
+def _uniform_series(low, high, count):
+    """count uniform floats in [low, high)"""
+    span = high - low
+    draw = random.random
+    return [low + span * draw() for _ in range(count)]
+
+
+def _rand_decimal(low, high, places=2, rng=random):
+    """Uniform Decimal in [low, high] rounded to the column's decimal_places"""
+    return Decimal(f'{rng.uniform(low, high):.{places}f}')
+
+
+def _copy_insert(model, objs):
+    """Insert unsaved instances with one Postgres COPY instead of batched INSERTs
+
+    CSV writes blank strings as NULL, so this is only for tables without text columns.
+    """
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objs:
+        writer.writerow([field.get_db_prep_save(field.pre_save(obj, add=True), connection) for field in fields])
+    buffer.seek(0)
+
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH CSV',
+            buffer
+        )
+
+
+@contextmanager
+def _deferred_indexes(models):
+    """Drop the models' Meta.indexes for the block and build them once afterwards (Postgres only)
+
+    Use inside a transaction: Postgres DDL is transactional, so a failed seed
+    rolls the drop back along with the rows.
+    """
+    if connection.vendor != 'postgresql':
+        yield
+        return
+
+    indexes = [(model, index) for model in models for index in model._meta.indexes]
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+    yield
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.add_index(model, index)
+
+
 class Command(BaseCommand):
     help = 'Seed the database with ambulance sample data'
 
@@ -22,44 +112,98 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing ambulance data before seeding',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=int(os.getenv('MEDICONNECT_SEED_BATCH_SIZE', DEFAULT_BATCH_SIZE)),
+            help='Rows per bulk INSERT (default: $MEDICONNECT_SEED_BATCH_SIZE or 1000)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Threads for the steps that only depend on the fleet; above 1 they commit separately',
+        )
 
     def handle(self, *args, **options):
-        if options['clear']:
-            self.stdout.write('Clearing existing ambulance data...')
-            self.clear_ambulance_data()
+        self.batch_size = options['batch_size']
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            # SQLite allows one writer at a time, so parallel steps would only wait on the lock
+            self.stdout.write(self.style.WARNING('SQLite does not take concurrent writes; seeding with 1 worker'))
+            workers = 1
+        # Fixed seed so every run produces the same sample data
+        seed = int(os.getenv('MEDICONNECT_SEED_RANDOM_SEED', 0))
+        random.seed(seed)
 
-        self.stdout.write('Seeding database with ambulance sample data...')
-        
-        # Create ambulance infrastructure
-        self.create_ambulance_types()
-        self.create_ambulance_stations()
-        self.create_ambulances()
-        self.create_ambulance_crews()
-        
-        # Create operational data
-        self.create_dispatches()
-        self.create_gps_logs()
-        self.create_maintenance_records()
-        self.create_equipment_inventory()
-        self.create_fuel_logs()
-        self.create_incident_reports()
-        self.create_performance_metrics()
+        # Bulk inserts never send post_save, but --clear's deletes send post_delete per row
+        with muted_cache_receivers():
+            if options['clear']:
+                self.stdout.write('Clearing existing ambulance data...')
+                with transaction.atomic():
+                    self.clear_ambulance_data()
+
+            self.stdout.write('Seeding database with ambulance sample data...')
+
+            # One transaction for the whole seed: a single commit, and nothing half-seeded on failure
+            with transaction.atomic():
+                # A fresh load builds each secondary index once, after the rows are in
+                with _deferred_indexes(SEEDED_MODELS) if options['clear'] else nullcontext():
+                    # Create ambulance infrastructure
+                    self.create_ambulance_types()
+                    self.create_ambulance_stations()
+                    self.create_ambulances(
+                        list(AmbulanceType.objects.values_list('id', flat=True)),
+                        list(AmbulanceStation.objects.values_list('id', flat=True))
+                    )
+
+                    # Load the fleet once and share it with every dependent step. The steps
+                    # only read these columns and never follow a foreign key, so no joins
+                    ambulances = list(Ambulance.objects.only('id', 'license_plate', 'mileage'))
+                    self.create_ambulance_crews(ambulances)
+
+                    # Create operational data
+                    self.create_dispatches(ambulances)
+                    self.create_gps_logs(ambulances)
+                    self.create_incident_reports()
+
+                    # These steps only depend on the fleet, not on each other
+                    fleet_steps = [
+                        self.create_maintenance_records, self.create_equipment_inventory,
+                        self.create_fuel_logs, self.create_performance_metrics
+                    ]
+                    # A generator per step, so threaded runs draw the same values as serial ones
+                    step_rngs = [random.Random(seed + index) for index in range(1, len(fleet_steps) + 1)]
+                    if workers == 1:
+                        for step, rng in zip(fleet_steps, step_rngs):
+                            step(ambulances, rng)
+
+            if workers > 1:
+                # Each thread commits on its own connection, after the fleet above is visible
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(
+                        lambda step, rng: self.run_in_thread(step, ambulances, rng), fleet_steps, step_rngs
+                    ))
+
+        # Drop the option caches once, in place of the invalidations that were skipped
+        cache.delete_many([key for _, _, key in CACHE_RECEIVERS])
 
         self.stdout.write(
             self.style.SUCCESS('Successfully seeded database with ambulance sample data!')
         )
 
+    def run_in_thread(self, step, ambulances, rng):
+        """Run a seed step in its own transaction on this thread's connection"""
+        try:
+            with transaction.atomic():
+                step(ambulances, rng)
+        finally:
+            connections.close_all()
+
     def clear_ambulance_data(self):
         """Clear existing ambulance data"""
-        models_to_clear = [
-            PerformanceMetrics, IncidentReport, FuelLog, EquipmentInventory,
-            MaintenanceRecord, GPSTrackingLog, Dispatch, AmbulanceCrew,
-            Ambulance, AmbulanceStation, AmbulanceType
-        ]
-        
-        for model in models_to_clear:
-            model.objects.all().delete()
-            self.stdout.write(f'Cleared {model.__name__}')
+        clear_models(CLEARED_MODELS)
+        self.stdout.write('\n'.join(f'Cleared {model.__name__}' for model in CLEARED_MODELS))
 
     def create_ambulance_types(self):
         """Create ambulance types"""
@@ -76,11 +220,11 @@ class Command(BaseCommand):
             {'name': 'Mass Casualty Unit', 'code': 'MCU', 'description': 'Multiple patient transport capability'},
         ]
         
-        for data in types_data:
-            AmbulanceType.objects.get_or_create(
-                code=data['code'],
-                defaults=data
-            )
+        AmbulanceType.objects.bulk_create(
+            [AmbulanceType(**data) for data in types_data],
+            ignore_conflicts=True,
+            batch_size=self.batch_size
+        )
 
     def create_ambulance_stations(self):
         """Create ambulance stations"""
@@ -97,17 +241,15 @@ class Command(BaseCommand):
             {'name': 'Emergency Hub', 'code': 'EMRG', 'address': '1000 Emergency Blvd', 'latitude': 40.7628, 'longitude': -74.0560, 'phone': '+1-555-5010'},
         ]
 
-        for data in stations_data:
-            AmbulanceStation.objects.get_or_create(
-                code=data['code'],
-                defaults=data
-            )
+        AmbulanceStation.objects.bulk_create(
+            [AmbulanceStation(**data) for data in stations_data],
+            ignore_conflicts=True,
+            batch_size=self.batch_size
+        )
 
-    def create_ambulances(self):
+    def create_ambulances(self, type_ids, station_ids):
         """Create sample ambulances"""
-        ambulance_types = AmbulanceType.objects.all()
-        stations = AmbulanceStation.objects.all()
-        
+        now = timezone.now()
         ambulances_data = [
             {'license_plate': 'AMB-001', 'make': 'Ford', 'model': 'Transit', 'year': 2022},
             {'license_plate': 'AMB-002', 'make': 'Mercedes', 'model': 'Sprinter', 'year': 2023},
@@ -120,37 +262,49 @@ class Command(BaseCommand):
             {'license_plate': 'AMB-009', 'make': 'Ford', 'model': 'E-Series', 'year': 2022},
             {'license_plate': 'AMB-010', 'make': 'Ram', 'model': 'ProMaster', 'year': 2023},
         ]
-        
-        for i, data in enumerate(ambulances_data):
-            Ambulance.objects.get_or_create(
-                license_plate=data['license_plate'],
-                defaults={
-                    **data,
-                    'vehicle_identification_number': f'1HGBH41JXMN{100000 + i}',
-                    'ambulance_type': ambulance_types[i % len(ambulance_types)],
-                    'home_station': stations[i % len(stations)],
-                    'color': random.choice(['White', 'Yellow', 'Red', 'Blue']),
-                    'status': random.choice(['available', 'dispatched', 'maintenance']),
-                    'condition': random.choice(['excellent', 'good', 'fair']),
-                    'fuel_level': random.randint(20, 100),
-                    'mileage': random.randint(10000, 150000),
-                    'last_maintenance': timezone.now() - timedelta(days=random.randint(1, 90)),
-                    'next_maintenance': timezone.now() + timedelta(days=random.randint(30, 180)),
-                    'current_latitude': 40.7128 + random.uniform(-0.1, 0.1),
-                    'current_longitude': -74.0060 + random.uniform(-0.1, 0.1),
-                    'base_latitude': 40.7128 + random.uniform(-0.1, 0.1),
-                    'base_longitude': -74.0060 + random.uniform(-0.1, 0.1),
-                    'gps_device_id': f'GPS{10000 + i}',
-                    'last_gps_update': timezone.now() - timedelta(minutes=random.randint(1, 60)),
-                    'speed': random.uniform(0, 80),
-                    'heading': random.uniform(0, 360),
-                }
+
+        # Draw each choice column in one call instead of one random.choice per row
+        count = len(ambulances_data)
+        colors = random.choices(AMBULANCE_COLORS, k=count)
+        statuses = random.choices(AMBULANCE_STATUSES, k=count)
+        conditions = random.choices(AMBULANCE_CONDITIONS, k=count)
+
+        ambulances = [
+            Ambulance(
+                **data,
+                vehicle_identification_number=f'1HGBH41JXMN{100000 + i}',
+                ambulance_type_id=type_id,
+                home_station_id=station_id,
+                color=colors[i],
+                status=statuses[i],
+                condition=conditions[i],
+                fuel_level=random.randint(20, 100),
+                mileage=random.randint(10000, 150000),
+                last_maintenance=now - timedelta(days=random.randint(1, 90)),
+                next_maintenance=now + timedelta(days=random.randint(30, 180)),
+                current_latitude=40.7128 + random.uniform(-0.1, 0.1),
+                current_longitude=-74.0060 + random.uniform(-0.1, 0.1),
+                base_latitude=40.7128 + random.uniform(-0.1, 0.1),
+                base_longitude=-74.0060 + random.uniform(-0.1, 0.1),
+                gps_device_id=f'GPS{10000 + i}',
+                last_gps_update=now - timedelta(minutes=random.randint(1, 60)),
+                speed=random.uniform(0, 80),
+                heading=random.uniform(0, 360),
             )
+            for i, (data, type_id, station_id) in enumerate(zip(ambulances_data, cycle(type_ids), cycle(station_ids)))
+        ]
+        # Re-runs refresh the live state of existing ambulances in the same INSERT ... ON CONFLICT
+        Ambulance.objects.bulk_create(
+            ambulances,
+            update_conflicts=True,
+            unique_fields=['license_plate'],
+            update_fields=['status', 'fuel_level', 'current_latitude', 'current_longitude', 'last_gps_update'],
+            batch_size=self.batch_size
+        )
 
-    def create_ambulance_crews(self):
+    def create_ambulance_crews(self, ambulances):
         """Create ambulance crew members"""
-        ambulances = Ambulance.objects.all()
-
+        midnight = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
         crew_data = [
             {'first_name': 'John', 'last_name': 'Smith', 'role': 'paramedic'},
             {'first_name': 'Sarah', 'last_name': 'Johnson', 'role': 'emt'},
@@ -164,170 +318,269 @@ class Command(BaseCommand):
             {'first_name': 'Michelle', 'last_name': 'White', 'role': 'paramedic'},
         ]
 
-        for i, data in enumerate(crew_data):
-            # Create user for crew member
-            user, created = User.objects.get_or_create(
-                username=f"crew_{data['first_name'].lower()}_{data['last_name'].lower()}",
-                defaults={
-                    'first_name': data['first_name'],
-                    'last_name': data['last_name'],
-                    'email': f"{data['first_name'].lower()}.{data['last_name'].lower()}@mediconnect.com",
-                    'password': 'pbkdf2_sha256$600000$test$test'
-                }
+        for data in crew_data:
+            data['username'] = f"crew_{data['first_name'].lower()}_{data['last_name'].lower()}"
+        usernames = [data['username'] for data in crew_data]
+
+        # Create the missing crew users in one insert; bulk_create skips the
+        # post_save profile hook, so their profiles are inserted alongside
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        # Hash the shared seed password once rather than once per user
+        password = make_password(SEED_PASSWORD) if len(existing) < len(usernames) else None
+        new_users = [
+            User(
+                username=data['username'],
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                email=f"{data['first_name'].lower()}.{data['last_name'].lower()}@mediconnect.com",
+                password=password
             )
+            for data in crew_data if data['username'] not in existing
+        ]
+        User.objects.bulk_create(new_users, ignore_conflicts=True, batch_size=self.batch_size)
+        users_by_name = User.objects.in_bulk(usernames, field_name='username')
+        Profile.objects.bulk_create(
+            [Profile(user=users_by_name[user.username]) for user in new_users],
+            ignore_conflicts=True,
+            batch_size=self.batch_size
+        )
 
-            # Create crew assignment
-            AmbulanceCrew.objects.get_or_create(
-                ambulance=ambulances[i % len(ambulances)],
-                crew_member=user,
-                defaults={
-                    'role': data['role'],
-                    'shift_start': timezone.now().replace(hour=random.randint(6, 18), minute=0, second=0, microsecond=0),
-                    'shift_end': timezone.now().replace(hour=random.randint(18, 23), minute=0, second=0, microsecond=0),
-                    'is_primary': i % 3 == 0,  # Every third crew member is primary
-                }
+        # Shifts start and end on the hour, so offset today's midnight by whole hours
+        count = len(crew_data)
+        crews = [
+            AmbulanceCrew(
+                ambulance_id=ambulance.pk,
+                crew_member_id=users_by_name[data['username']].pk,
+                role=data['role'],
+                shift_start=midnight + timedelta(hours=start_hour),
+                shift_end=midnight + timedelta(hours=end_hour),
+                is_primary=i % 3 == 0,  # Every third crew member is primary
             )
+            for i, (data, ambulance, start_hour, end_hour) in enumerate(zip(
+                crew_data, cycle(ambulances),
+                random.choices(range(6, 19), k=count),
+                random.choices(range(18, 24), k=count)
+            ))
+        ]
+
+        # Shift times are random, so skip existing assignments to keep re-runs idempotent
+        assigned = set(AmbulanceCrew.objects.values_list('ambulance_id', 'crew_member_id'))
+        AmbulanceCrew.objects.bulk_create(
+            [crew for crew in crews if (crew.ambulance_id, crew.crew_member_id) not in assigned],
+            batch_size=self.batch_size
+        )
 
-    def create_dispatches(self):
+    def create_dispatches(self, ambulances):
         """Create sample dispatches"""
-        ambulances = Ambulance.objects.all()
-        users = User.objects.all()
-        
-        for i in range(10):
-            Dispatch.objects.get_or_create(
-                dispatch_number=f'DISP-{1000 + i}',
-                defaults={
-                    'ambulance': ambulances[i % len(ambulances)],
-                    'dispatcher': users[0] if users.exists() else None,
-                    'priority': random.choice(['routine', 'urgent', 'emergency']),
-                    'status': random.choice(['requested', 'dispatched', 'en_route_pickup', 'on_scene', 'patient_loaded', 'en_route_hospital', 'at_hospital', 'completed']),
-                    'pickup_address': f'{(i+1)*100} Pickup St, City, State',
-                    'pickup_latitude': Decimal(str(40.7128 + random.uniform(-0.1, 0.1))),
-                    'pickup_longitude': Decimal(str(-74.0060 + random.uniform(-0.1, 0.1))),
-                    'destination_address': f'{(i+1)*200} Hospital Ave, City, State',
-                    'destination_latitude': Decimal(str(40.7128 + random.uniform(-0.1, 0.1))),
-                    'destination_longitude': Decimal(str(-74.0060 + random.uniform(-0.1, 0.1))),
-                    'estimated_pickup_time': timezone.now() + timedelta(minutes=random.randint(5, 30)),
-                    'estimated_arrival_time': timezone.now() + timedelta(minutes=random.randint(30, 90)),
-                    'distance_km': Decimal(str(random.uniform(1.0, 50.0))),
-                    'special_instructions': f'Special instructions for dispatch {i+1}',
-                    'contact_person': f'Contact Person {i+1}',
-                    'contact_phone': f'+1-555-{7000 + i}',
-                }
+        now = timezone.now()
+        referral_ids = list(Referral.objects.values_list('id', flat=True))
+        if not referral_ids:
+            self.stdout.write(self.style.WARNING('No referrals found; skipping dispatches'))
+            return
+
+        # Every sample dispatch is logged by the same user, so look it up once
+        dispatcher_id = User.objects.order_by('pk').values_list('id', flat=True).first()
+
+        # Format each text column in one pass, ahead of building the rows
+        numbers = range(1, DISPATCH_COUNT + 1)
+        text_columns = zip(
+            [f'DISP-{999 + n}' for n in numbers],
+            [f'{n * 100} Pickup St, City, State' for n in numbers],
+            [f'{n * 200} Hospital Ave, City, State' for n in numbers],
+            [f'Special instructions for dispatch {n}' for n in numbers],
+            [f'Contact Person {n}' for n in numbers],
+            [f'+1-555-{6999 + n}' for n in numbers],
+        )
+
+        dispatches = [
+            Dispatch(
+                dispatch_number=number,
+                ambulance_id=ambulance.pk,
+                referral_id=referral_id,
+                dispatcher_id=dispatcher_id,
+                priority=priority,
+                status=status,
+                pickup_address=pickup_address,
+                pickup_latitude=40.7128 + random.uniform(-0.1, 0.1),
+                pickup_longitude=-74.0060 + random.uniform(-0.1, 0.1),
+                destination_address=destination_address,
+                destination_latitude=40.7128 + random.uniform(-0.1, 0.1),
+                destination_longitude=-74.0060 + random.uniform(-0.1, 0.1),
+                estimated_pickup_time=now + timedelta(minutes=random.randint(5, 30)),
+                estimated_arrival_time=now + timedelta(minutes=random.randint(30, 90)),
+                distance_km=random.uniform(1.0, 50.0),
+                special_instructions=instructions,
+                contact_person=contact_person,
+                contact_phone=contact_phone,
             )
+            for (number, pickup_address, destination_address, instructions, contact_person, contact_phone),
+                ambulance, referral_id, priority, status in zip(
+                    text_columns, cycle(ambulances), cycle(referral_ids),
+                    random.choices(DISPATCH_PRIORITIES, k=DISPATCH_COUNT),
+                    random.choices(DISPATCH_STATUSES, k=DISPATCH_COUNT)
+                )
+        ]
+        Dispatch.objects.bulk_create(dispatches, ignore_conflicts=True, batch_size=self.batch_size)
 
-    def create_gps_logs(self):
+    def create_gps_logs(self, ambulances):
         """Create GPS tracking logs"""
-        ambulances = Ambulance.objects.all()
-
-        for ambulance in ambulances:
-            for i in range(5):  # 5 logs per ambulance
-                GPSTrackingLog.objects.get_or_create(
-                    ambulance=ambulance,
-                    timestamp=timezone.now() - timedelta(hours=random.randint(1, 24)),
-                    defaults={
-                        'latitude': Decimal(str(40.7128 + random.uniform(-0.1, 0.1))),
-                        'longitude': Decimal(str(-74.0060 + random.uniform(-0.1, 0.1))),
-                        'speed': Decimal(str(random.uniform(0, 80))),
-                        'heading': random.randint(0, 360),
-                        'altitude': Decimal(str(random.uniform(0, 500))),
-                    }
-                )
+        now = timezone.now()
+        count = len(ambulances) * GPS_LOGS_PER_AMBULANCE
+        owner_ids = [ambulance.pk for ambulance in ambulances for _ in range(GPS_LOGS_PER_AMBULANCE)]
+        # Each ambulance's track is a ping a minute, ending now
+        timestamps = [
+            now - timedelta(minutes=GPS_LOGS_PER_AMBULANCE - 1 - i)
+            for _ in ambulances for i in range(GPS_LOGS_PER_AMBULANCE)
+        ]
+
+        # Draw each column in one pass instead of several random calls per row
+        columns = zip(
+            owner_ids,
+            timestamps,
+            _uniform_series(40.7128 - 0.1, 40.7128 + 0.1, count),
+            _uniform_series(-74.0060 - 0.1, -74.0060 + 0.1, count),
+            _uniform_series(0, 80, count),
+            random.choices(range(361), k=count),
+            _uniform_series(0, 500, count),
+        )
+
+        logs = [
+            GPSTrackingLog(
+                ambulance_id=ambulance_id,
+                timestamp=timestamp,
+                latitude=latitude,
+                longitude=longitude,
+                speed=speed,
+                heading=heading,
+                altitude=altitude,
+            )
+            for ambulance_id, timestamp, latitude, longitude, speed, heading, altitude in columns
+        ]
+        # GPS logs are the table load tests grow, so stream them through COPY where available
+        if connection.vendor == 'postgresql':
+            _copy_insert(GPSTrackingLog, logs)
+        else:
+            GPSTrackingLog.objects.bulk_create(logs, batch_size=self.batch_size)
 
-    def create_maintenance_records(self):
+    def create_maintenance_records(self, ambulances, rng):
         """Create maintenance records"""
-        ambulances = Ambulance.objects.all()
-        maintenance_types = ['routine', 'repair', 'inspection', 'emergency']
-
-        for i, ambulance in enumerate(ambulances):
-            MaintenanceRecord.objects.get_or_create(
-                ambulance=ambulance,
-                maintenance_date=timezone.now().date() - timedelta(days=random.randint(1, 90)),
-                defaults={
-                    'maintenance_type': random.choice(maintenance_types),
-                    'description': f'Maintenance work performed on {ambulance.license_plate}',
-                    'cost': Decimal(str(random.uniform(100, 5000))),
-                    'performed_by': f'Technician {i+1}',
-                    'next_maintenance_due': timezone.now().date() + timedelta(days=random.randint(30, 180)),
-                    'parts_replaced': f'Sample parts for {ambulance.license_plate}',
-                    'labor_hours': Decimal(str(random.uniform(1, 8))),
-                }
+        now = timezone.now()
+        maintenance_types = rng.choices(MAINTENANCE_TYPES, k=len(ambulances))
+
+        records = [
+            MaintenanceRecord(
+                ambulance_id=ambulance.pk,
+                maintenance_type=maintenance_types[i],
+                description=f'Maintenance work performed on {ambulance.license_plate}',
+                cost=_rand_decimal(100, 5000, rng=rng),
+                performed_by=f'Technician {i+1}',
+                parts_replaced=['Oil filter', 'Brake pads'],
+                mileage_at_service=ambulance.mileage,
+                next_service_mileage=ambulance.mileage + 5000,
+                service_date=now - timedelta(days=rng.randint(1, 90)),
+                next_service_date=now + timedelta(days=rng.randint(30, 180)),
             )
+            for i, ambulance in enumerate(ambulances)
+        ]
+        MaintenanceRecord.objects.bulk_create(records, batch_size=self.batch_size)
 
-    def create_equipment_inventory(self):
+    def create_equipment_inventory(self, ambulances, rng):
         """Create equipment inventory"""
-        ambulances = Ambulance.objects.all()
+        now = timezone.now()
+        today = now.date()
         equipment_items = [
             'Defibrillator', 'Oxygen Tank', 'Stretcher', 'First Aid Kit',
             'Blood Pressure Monitor', 'Pulse Oximeter', 'Splints', 'Bandages',
             'IV Supplies', 'Medications'
         ]
 
-        for i, ambulance in enumerate(ambulances):
-            item = equipment_items[i % len(equipment_items)]
-            EquipmentInventory.objects.get_or_create(
-                ambulance=ambulance,
-                item_name=item,
-                defaults={
-                    'quantity': random.randint(1, 10),
-                    'condition': random.choice(['excellent', 'good', 'fair', 'needs_replacement']),
-                    'last_checked': timezone.now().date() - timedelta(days=random.randint(1, 30)),
-                    'expiry_date': timezone.now().date() + timedelta(days=random.randint(30, 365)),
-                    'supplier': f'Medical Supply Co {i+1}',
-                    'cost_per_unit': Decimal(str(random.uniform(10, 1000))),
-                }
+        conditions = rng.choices(EQUIPMENT_CONDITIONS, k=len(ambulances) * len(equipment_items))
+
+        # Stock every ambulance with the full equipment list
+        items = [
+            EquipmentInventory(
+                ambulance_id=ambulance.pk,
+                equipment_name=equipment_name,
+                category='medical',
+                quantity=rng.randint(1, 10),
+                condition=conditions[i],
+                last_checked=now - timedelta(days=rng.randint(1, 30)),
+                expiry_date=today + timedelta(days=rng.randint(30, 365)),
+                notes=f'Supplied by Medical Supply Co {i+1}',
             )
+            for i, (ambulance, equipment_name) in enumerate(product(ambulances, equipment_items))
+        ]
+        # (ambulance, equipment_name, serial_number) is unique, so re-runs skip existing items
+        EquipmentInventory.objects.bulk_create(items, ignore_conflicts=True, batch_size=self.batch_size)
 
-    def create_fuel_logs(self):
+    def create_fuel_logs(self, ambulances, rng):
         """Create fuel logs"""
-        ambulances = Ambulance.objects.all()
-
-        for i, ambulance in enumerate(ambulances):
-            FuelLog.objects.get_or_create(
-                ambulance=ambulance,
-                date=timezone.now().date() - timedelta(days=random.randint(1, 30)),
-                defaults={
-                    'fuel_amount': Decimal(str(random.uniform(20, 80))),
-                    'cost': Decimal(str(random.uniform(50, 200))),
-                    'odometer_reading': random.randint(ambulance.mileage, ambulance.mileage + 1000),
-                    'fuel_station': f'Gas Station {i+1}',
-                    'driver_name': f'Driver {i+1}',
-                }
+        logs = [
+            FuelLog(
+                ambulance_id=ambulance.pk,
+                fuel_amount=rng.uniform(20, 80),
+                cost=_rand_decimal(50, 200, rng=rng),
+                mileage=rng.randint(ambulance.mileage, ambulance.mileage + 1000),
+                fuel_station=f'Gas Station {i+1}',
+                receipt_number=f'RCPT-{ambulance.license_plate}-{i+1}',
             )
+            for i, ambulance in enumerate(ambulances)
+        ]
+        # Receipt numbers are unique per ambulance, so re-runs skip logs already recorded
+        FuelLog.objects.bulk_create(logs, ignore_conflicts=True, batch_size=self.batch_size)
 
     def create_incident_reports(self):
         """Create incident reports"""
-        dispatches = Dispatch.objects.all()
-
-        for i, dispatch in enumerate(dispatches[:10]):
-            IncidentReport.objects.get_or_create(
-                dispatch=dispatch,
-                defaults={
-                    'incident_type': random.choice(['medical_emergency', 'accident', 'equipment_failure', 'other']),
-                    'description': f'Incident report for dispatch {dispatch.dispatch_number}',
-                    'severity': random.choice(['low', 'medium', 'high', 'critical']),
-                    'reported_by': f'Crew Member {i+1}',
-                    'actions_taken': f'Actions taken for incident {i+1}',
-                    'outcome': random.choice(['resolved', 'ongoing', 'escalated']),
-                    'follow_up_required': random.choice([True, False]),
-                }
+        now = timezone.now()
+        reporter_id = User.objects.order_by('pk').values_list('id', flat=True).first()
+        if reporter_id is None:
+            return
+
+        # One report per dispatch; dispatches that already have one are skipped
+        dispatches = list(Dispatch.objects.filter(incident_reports__isnull=True)[:10])
+        count = len(dispatches)
+        incident_types = random.choices(INCIDENT_TYPES, k=count)
+        severities = random.choices(INCIDENT_SEVERITIES, k=count)
+        follow_ups = random.choices((True, False), k=count)
+        resolved = random.choices((True, False), k=count)
+
+        reports = [
+            IncidentReport(
+                ambulance_id=dispatch.ambulance_id,
+                dispatch_id=dispatch.pk,
+                incident_type=incident_types[i],
+                severity=severities[i],
+                title=f'Incident during dispatch {dispatch.dispatch_number}',
+                description=f'Incident report for dispatch {dispatch.dispatch_number}',
+                incident_time=now - timedelta(hours=random.randint(1, 72)),
+                reported_by_id=reporter_id,
+                follow_up_required=follow_ups[i],
+                resolved=resolved[i],
+                resolution_notes=f'Actions taken for incident {i+1}',
             )
+            for i, dispatch in enumerate(dispatches)
+        ]
+        IncidentReport.objects.bulk_create(reports, batch_size=self.batch_size)
 
-    def create_performance_metrics(self):
+    def create_performance_metrics(self, ambulances, rng):
         """Create performance metrics"""
-        ambulances = Ambulance.objects.all()
-
-        for i, ambulance in enumerate(ambulances):
-            PerformanceMetrics.objects.get_or_create(
-                ambulance=ambulance,
-                date=timezone.now().date() - timedelta(days=random.randint(1, 30)),
-                defaults={
-                    'total_calls': random.randint(1, 20),
-                    'average_response_time': Decimal(str(random.uniform(5, 30))),
-                    'fuel_efficiency': Decimal(str(random.uniform(8, 15))),
-                    'distance_traveled': Decimal(str(random.uniform(50, 500))),
-                    'patient_satisfaction_score': Decimal(str(random.uniform(3.0, 5.0))),
-                    'crew_performance_score': Decimal(str(random.uniform(3.0, 5.0))),
-                    'equipment_reliability_score': Decimal(str(random.uniform(3.0, 5.0))),
-                }
+        today = timezone.now().date()
+        metrics = [
+            PerformanceMetrics(
+                ambulance_id=ambulance.pk,
+                date=today - timedelta(days=rng.randint(1, 30)),
+                total_dispatches=rng.randint(1, 20),
+                completed_dispatches=rng.randint(1, 15),
+                cancelled_dispatches=rng.randint(0, 3),
+                average_response_time=timedelta(minutes=rng.uniform(5, 30)),
+                total_distance=rng.uniform(50, 500),
+                fuel_consumed=rng.uniform(20, 80),
+                operational_hours=rng.uniform(6, 12),
+                downtime_hours=rng.uniform(0, 4),
+                patient_satisfaction_avg=rng.uniform(3.0, 5.0),
+                incident_count=rng.randint(0, 2),
             )
+            for ambulance in ambulances
+        ]
+        # (ambulance, date) is unique, so re-runs skip days that are already recorded
+        PerformanceMetrics.objects.bulk_create(metrics, ignore_conflicts=True, batch_size=self.batch_size)
@@ -0,0 +1,76 @@
+"""Helpers shared by the seed_ambulances and seed_database commands"""
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+
+from ambulances.models import (
+    Ambulance, AmbulanceType, AmbulanceStation, AmbulanceCrew,
+    Dispatch, DispatchCrew, DispatchStatusHistory, RouteOptimization,
+    GPSTrackingLog, MaintenanceRecord, EquipmentInventory,
+    FuelLog, IncidentReport, PerformanceMetrics,
+    ACTIVE_AMBULANCE_TYPES_CACHE_KEY, ACTIVE_STATIONS_CACHE_KEY, ACTIVE_AMBULANCES_CACHE_KEY,
+    invalidate_ambulance_type_choices, invalidate_station_choices, invalidate_ambulance_choices
+)
+
+# Rows per INSERT; past ~1000 larger statements stop paying for themselves
+DEFAULT_BATCH_SIZE = 1000
+
+# Tables filled by seed_ambulances, children before parents
+SEEDED_MODELS = [
+    PerformanceMetrics, IncidentReport, FuelLog, EquipmentInventory,
+    MaintenanceRecord, GPSTrackingLog, Dispatch, AmbulanceCrew,
+    Ambulance, AmbulanceStation, AmbulanceType
+]
+
+# Tables emptied by seed_ambulances --clear: the seeded ones plus the dispatch children they own
+CLEARED_MODELS = [DispatchCrew, DispatchStatusHistory, RouteOptimization] + SEEDED_MODELS
+
+# Rows removed per DELETE when clearing, so --clear never loads a whole table
+CLEAR_CHUNK_SIZE = 2000
+
+# Option cache receivers muted while seeding, with the key each one drops
+CACHE_RECEIVERS = [
+    (invalidate_ambulance_type_choices, AmbulanceType, ACTIVE_AMBULANCE_TYPES_CACHE_KEY),
+    (invalidate_station_choices, AmbulanceStation, ACTIVE_STATIONS_CACHE_KEY),
+    (invalidate_ambulance_choices, Ambulance, ACTIVE_AMBULANCES_CACHE_KEY),
+]
+
+
+def clear_models(models):
+    """Empty the models' tables, children listed before parents
+
+    On Postgres a single TRUNCATE covers them when no other table references
+    them. Otherwise rows go through the ORM delete so on_delete is honoured.
+    """
+    tables = {model._meta.db_table for model in models} | {
+        field.remote_field.through._meta.db_table
+        for model in models for field in model._meta.local_many_to_many
+    }
+    referenced_elsewhere = any(
+        (rel.through if rel.many_to_many else rel.related_model)._meta.db_table not in tables
+        for model in models for rel in model._meta.related_objects
+    )
+    if connection.vendor == 'postgresql' and not referenced_elsewhere:
+        quoted = ', '.join(connection.ops.quote_name(table) for table in sorted(tables))
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {quoted} RESTART IDENTITY')
+        return
+
+    for model in models:
+        while ids := list(model.objects.values_list('pk', flat=True)[:CLEAR_CHUNK_SIZE]):
+            model.objects.filter(pk__in=ids).delete()
+
+
+@contextmanager
+def muted_cache_receivers():
+    """Disconnect the option cache invalidation receivers for the duration of the block"""
+    for receiver, sender, _ in CACHE_RECEIVERS:
+        for signal in (post_save, post_delete):
+            signal.disconnect(receiver, sender=sender)
+    try:
+        yield
+    finally:
+        for receiver, sender, _ in CACHE_RECEIVERS:
+            for signal in (post_save, post_delete):
+                signal.connect(receiver, sender=sender)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-16 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ambulances', '0003_trafficcondition_routeoptimization_geofencezone_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dispatch',
+            index=models.Index(fields=['status', 'created_at'], name='ambulances__status_07292e_idx'),
+        ),
+    ]
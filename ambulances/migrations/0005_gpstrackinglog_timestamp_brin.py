@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def create_brin_index(apps, schema_editor):
+    # BRIN is PostgreSQL-only; the append-only timestamp column suits it well
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS ambulances_gpslog_ts_brin "
+        "ON ambulances_gpstrackinglog USING BRIN (timestamp)"
+    )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS ambulances_gpslog_ts_brin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ambulances', '0004_dispatch_status_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-16 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ambulances', '0005_gpstrackinglog_timestamp_brin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dispatch',
+            index=models.Index(condition=models.Q(('status__in', ('dispatched', 'en_route_pickup', 'on_scene', 'patient_loaded', 'en_route_hospital'))), fields=['status'], include=('ambulance', 'priority', 'created_at', 'estimated_pickup_time', 'estimated_arrival_time'), name='dispatch_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emergencycall',
+            index=models.Index(condition=models.Q(('status__in', ('received', 'processing'))), fields=['status'], include=('received_at',), name='emergencycall_open_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# (index name, table, column) for columns hit by admin and list-view searches
+TRIGRAM_INDEXES = [
+    ('amb_plate_trgm', 'ambulances_ambulance', 'license_plate'),
+    ('amb_vin_trgm', 'ambulances_ambulance', 'vehicle_identification_number'),
+    ('amb_make_trgm', 'ambulances_ambulance', 'make'),
+    ('amb_model_trgm', 'ambulances_ambulance', 'model'),
+    ('dispatch_number_trgm', 'ambulances_dispatch', 'dispatch_number'),
+    ('dispatch_pickup_trgm', 'ambulances_dispatch', 'pickup_address'),
+    ('dispatch_dest_trgm', 'ambulances_dispatch', 'destination_address'),
+    ('emcall_number_trgm', 'ambulances_emergencycall', 'call_number'),
+    ('emcall_caller_trgm', 'ambulances_emergencycall', 'caller_name'),
+    ('emcall_patient_trgm', 'ambulances_emergencycall', 'patient_name'),
+    ('emcall_address_trgm', 'ambulances_emergencycall', 'incident_address'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Django compiles icontains to UPPER(col::text) LIKE ..., so index that expression
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} '
+            f'ON {table} USING GIN (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ambulances', '0006_active_dispatch_open_call_partial_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-16 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ambulances', '0007_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ambulancestation',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['is_active'], name='amb_station_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ambulancetype',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['is_active'], name='amb_type_active_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ambulances', '0008_ambulancetype_station_active_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='fuellog',
+            constraint=models.UniqueConstraint(condition=models.Q(('receipt_number', ''), _negated=True), fields=('ambulance', 'receipt_number'), name='fuellog_unique_receipt'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-16 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ambulances', '0009_fuellog_unique_receipt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ambulance',
+            index=models.Index(condition=models.Q(('is_active', True), ('status', 'available')), fields=['current_latitude', 'current_longitude'], name='amb_avail_loc'),
+        ),
+    ]
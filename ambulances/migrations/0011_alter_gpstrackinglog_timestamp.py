@@ -0,0 +1,19 @@
+# Generated by Django 4.2.11 on 2026-10-16 20:25
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ambulances', '0010_ambulance_available_location_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gpstrackinglog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Timestamp'),
+        ),
+    ]
@@ -1,15 +1,47 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import ASin, Cos, Now, Power, Radians, Sin, Sqrt
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.core.cache import cache
 # Temporarily disable GIS for basic setup
 # from django.contrib.gis.db import models as geomodels
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from django.utils.crypto import get_random_string
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.urls import reverse
+import math
 import uuid
 from datetime import timedelta
 
 
+# Dispatch statuses during which an ambulance is committed to a job
+ACTIVE_DISPATCH_STATUSES = (
+    'dispatched', 'en_route_pickup', 'on_scene', 'patient_loaded', 'en_route_hospital'
+)
+
+# Emergency call statuses still waiting on a dispatch decision
+OPEN_CALL_STATUSES = ('received', 'processing')
+
+# Mean Earth radius used by the Haversine distance helpers
+_EARTH_R_KM = 6371.0
+
+# Cached (pk, label) option lists for the form select widgets
+ACTIVE_AMBULANCE_TYPES_CACHE_KEY = 'ambulance:active_types:v1'
+ACTIVE_STATIONS_CACHE_KEY = 'ambulance:active_stations:v1'
+ACTIVE_AMBULANCES_CACHE_KEY = 'ambulance:active_ambulances:v1'
+
+
+class ActiveManager(models.Manager):
+    """Manager restricted to rows flagged is_active"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+
 class BaseModel(models.Model):
     """Abstract base model with common fields"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -30,15 +62,91 @@ class AmbulanceType(BaseModel):
     staff_requirements = models.JSONField(_('Staff Requirements'), default=list)
     capacity_range = models.CharField(_('Capacity Range'), max_length=20, default='1-2')
 
+    objects = models.Manager()
+    active = ActiveManager()
+
     class Meta:
         verbose_name = _('Ambulance Type')
         verbose_name_plural = _('Ambulance Types')
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['is_active'], name='amb_type_active_idx', condition=models.Q(is_active=True)),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class AmbulanceQuerySet(models.QuerySet):
+    """Ambulance queries that run in the database"""
+
+    def nearest_to(self, latitude, longitude, radius_km=None):
+        """Located ambulances annotated with distance_km to a point, nearest first
+
+        With radius_km, a bounding box on the raw columns lets the location
+        index skip far rows before the Haversine is evaluated.
+        """
+        queryset = self.filter(current_latitude__isnull=False, current_longitude__isnull=False)
+        if radius_km is not None:
+            dlat = math.degrees(radius_km / _EARTH_R_KM)
+            dlon = dlat / max(math.cos(math.radians(latitude)), 0.01)
+            queryset = queryset.filter(
+                current_latitude__range=(latitude - dlat, latitude + dlat),
+                current_longitude__range=(longitude - dlon, longitude + dlon),
+            )
+
+        lat1 = Radians('current_latitude')
+        lat2, lon2 = math.radians(latitude), math.radians(longitude)
+        a = (
+            Power(Sin((lat1 - lat2) / 2), 2)
+            + Cos(lat1) * math.cos(lat2) * Power(Sin((Radians('current_longitude') - lon2) / 2), 2)
+        )
+        queryset = queryset.annotate(distance_km=ASin(Sqrt(a)) * (2 * _EARTH_R_KM))
+        if radius_km is not None:
+            queryset = queryset.filter(distance_km__lte=radius_km)
+        return queryset.order_by('distance_km')
+
+    def with_status_flags(self):
+        """Annotate maintenance_due and fuel_band, read back by the matching properties"""
+        return self.annotate(
+            maintenance_due=Case(
+                When(next_maintenance__lte=Now(), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            ),
+            fuel_band=Case(
+                When(fuel_level__gte=75, then=Value('full')),
+                When(fuel_level__gte=50, then=Value('good')),
+                When(fuel_level__gte=25, then=Value('low')),
+                default=Value('critical'),
+                output_field=models.CharField(),
+            ),
+        )
+
+
+def _located_rows(queryset):
+    """(pk, latitude, longitude, cos latitude) in radians for ambulances with a fix"""
+    rows = queryset.filter(
+        current_latitude__isnull=False, current_longitude__isnull=False
+    ).values_list('id', 'current_latitude', 'current_longitude')
+    return [
+        (pk, math.radians(lat), math.radians(lon), math.cos(math.radians(lat)))
+        for pk, lat, lon in rows
+    ]
+
+
+def _distances_from(latitude, longitude, rows):
+    """Haversine km from a point to each of the _located_rows, keyed by pk"""
+    lat2, lon2 = math.radians(latitude), math.radians(longitude)
+    cos_lat2 = math.cos(lat2)
+    return {
+        pk: _EARTH_R_KM * 2.0 * math.asin(math.sqrt(
+            math.sin((lat2 - lat1) * 0.5)**2 + cos_lat1 * cos_lat2 * math.sin((lon2 - lon1) * 0.5)**2
+        ))
+        for pk, lat1, lon1, cos_lat1 in rows
+    }
+
+
 class Ambulance(BaseModel):
     """Enhanced ambulance model with comprehensive tracking"""
 
@@ -145,6 +253,8 @@ class Ambulance(BaseModel):
     registration_expiry = models.DateField(_('Registration Expiry'), null=True, blank=True)
     inspection_expiry = models.DateField(_('Inspection Expiry'), null=True, blank=True)
 
+    objects = AmbulanceQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Ambulance')
         verbose_name_plural = _('Ambulances')
@@ -153,6 +263,12 @@ class Ambulance(BaseModel):
             models.Index(fields=['status', 'ambulance_type']),
             models.Index(fields=['home_station', 'status']),
             models.Index(fields=['last_gps_update']),
+            # Nearest-ambulance search only scans the available fleet
+            models.Index(
+                fields=['current_latitude', 'current_longitude'],
+                condition=models.Q(status='available', is_active=True),
+                name='amb_avail_loc',
+            ),
         ]
 
     def __str__(self):
@@ -168,12 +284,16 @@ class Ambulance(BaseModel):
 
     @property
     def needs_maintenance(self):
+        if 'maintenance_due' in self.__dict__:
+            return self.maintenance_due
         if self.next_maintenance:
             return self.next_maintenance <= timezone.now()
         return False
 
     @property
     def fuel_status(self):
+        if 'fuel_band' in self.__dict__:
+            return self.fuel_band
         if self.fuel_level >= 75:
             return 'full'
         elif self.fuel_level >= 50:
@@ -194,23 +314,44 @@ class Ambulance(BaseModel):
 
     def calculate_distance_to(self, latitude, longitude):
         """Calculate distance to a given point using Haversine formula"""
-        if self.current_latitude and self.current_longitude:
-            import math
-
-            # Convert latitude and longitude from degrees to radians
-            lat1, lon1, lat2, lon2 = map(math.radians, [self.current_latitude, self.current_longitude, latitude, longitude])
-
-            # Haversine formula
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-            c = 2 * math.asin(math.sqrt(a))
-
-            # Radius of earth in kilometers
-            r = 6371
-            return c * r
-        return None
+        # 0.0 is a valid coordinate, so only a missing fix means no distance
+        if self.current_latitude is None or self.current_longitude is None:
+            return None
 
+        lat1 = math.radians(self.current_latitude)
+        lat2 = math.radians(latitude)
+        dlat = lat2 - lat1
+        dlon = math.radians(longitude - self.current_longitude)
+        a = math.sin(dlat * 0.5)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon * 0.5)**2
+        return _EARTH_R_KM * 2.0 * math.asin(math.sqrt(a))
+
+    @classmethod
+    def bulk_distance_to(cls, latitude, longitude, queryset=None):
+        """Distances in km from a point to every located ambulance, keyed by pk
+
+        Reads bare coordinate rows instead of model instances and works out the
+        point's own trig once, rather than once per ambulance.
+        """
+        if queryset is None:
+            queryset = cls.objects.filter(status='available', is_active=True)
+        return _distances_from(latitude, longitude, _located_rows(queryset))
+
+    @classmethod
+    def distance_matrix_to_stations(cls, queryset=None, stations=None):
+        """Distances in km from every station to every located ambulance
+
+        Returned as {station pk: {ambulance pk: km}}. The ambulance coordinates
+        are read and converted once and reused for every station.
+        """
+        if queryset is None:
+            queryset = cls.objects.filter(is_active=True)
+        if stations is None:
+            stations = AmbulanceStation.active.all()
+        rows = _located_rows(queryset)
+        return {
+            pk: _distances_from(latitude, longitude, rows)
+            for pk, latitude, longitude in stations.values_list('id', 'latitude', 'longitude')
+        }
 
 class AmbulanceStation(BaseModel):
     """Ambulance stations/bases"""
@@ -223,10 +364,16 @@ class AmbulanceStation(BaseModel):
     capacity = models.PositiveIntegerField(_('Ambulance Capacity'), default=5)
     is_24_hour = models.BooleanField(_('24 Hour Operation'), default=True)
 
+    objects = models.Manager()
+    active = ActiveManager()
+
     class Meta:
         verbose_name = _('Ambulance Station')
         verbose_name_plural = _('Ambulance Stations')
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['is_active'], name='amb_station_active_idx', condition=models.Q(is_active=True)),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.code})"
@@ -259,6 +406,65 @@ class AmbulanceCrew(BaseModel):
         return f"{self.crew_member} - {self.ambulance} ({self.role})"
 
 
+class DispatchQuerySet(models.QuerySet):
+    """Dispatch queries shared by the list pages"""
+
+    def for_list_view(self):
+        """Join every relation the dispatch list and dashboard rows render"""
+        return self.select_related(
+            'ambulance__ambulance_type', 'referral__patient', 'dispatcher'
+        ).prefetch_related(
+            # Crew names only, not whole user rows with their password hashes
+            models.Prefetch('primary_crew', queryset=get_user_model().objects.only('id', 'first_name', 'last_name'))
+        )
+
+    def bulk_transition(self, ids, new_status, user=None):
+        """Move many dispatches to one status with a single UPDATE and batched history rows
+
+        Mirrors Dispatch.update_status, including the response and transport
+        durations save() derives, without a save() and INSERT per dispatch.
+        Returns the number of dispatches transitioned.
+        """
+        now = timezone.now()
+        changes = {'status': new_status, 'updated_at': now}
+        timestamp_field = Dispatch.STATUS_TIMESTAMP_FIELDS.get(new_status)
+        if timestamp_field:
+            changes[timestamp_field] = now
+        # Durations that end at the new timestamp: (start column, minutes column)
+        duration = {
+            'on_scene_at': ('dispatched_at', 'response_time_minutes'),
+            'at_hospital_at': ('patient_loaded_at', 'transport_time_minutes'),
+        }.get(timestamp_field)
+
+        with transaction.atomic():
+            queryset = self.filter(pk__in=ids).select_for_update()
+            if duration:
+                start_field, minutes_field = duration
+                rows = list(queryset.values_list('id', 'status', start_field))
+                whens = [
+                    When(pk=pk, then=Value(int((now - started).total_seconds() / 60)))
+                    for pk, _status, started in rows if started
+                ]
+                if whens:
+                    changes[minutes_field] = Case(
+                        *whens, default=F(minutes_field), output_field=models.PositiveIntegerField()
+                    )
+            else:
+                rows = list(queryset.values_list('id', 'status'))
+            if not rows:
+                return 0
+
+            self.filter(pk__in=[row[0] for row in rows]).update(**changes)
+            DispatchStatusHistory.objects.bulk_create([
+                DispatchStatusHistory(
+                    dispatch_id=row[0], old_status=row[1], new_status=new_status,
+                    changed_by=user, timestamp=now
+                )
+                for row in rows
+            ], batch_size=500)
+        return len(rows)
+
+
 class Dispatch(BaseModel):
     """Enhanced dispatch model with comprehensive tracking"""
 
@@ -277,6 +483,8 @@ class Dispatch(BaseModel):
         ('cancelled', _('Cancelled')),
         ('failed', _('Failed')),
     ]
+    # get_status_display() rebuilds a dict from the choices on every call
+    STATUS_DISPLAY = dict(STATUS_CHOICES)
 
     PRIORITY_CHOICES = [
         ('routine', _('Routine')),
@@ -362,6 +570,8 @@ class Dispatch(BaseModel):
     billing_code = models.CharField(_('Billing Code'), max_length=50, blank=True)
     insurance_authorization = models.CharField(_('Insurance Authorization'), max_length=100, blank=True)
 
+    objects = DispatchQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Dispatch')
         verbose_name_plural = _('Dispatches')
@@ -371,26 +581,54 @@ class Dispatch(BaseModel):
             models.Index(fields=['ambulance', 'status']),
             models.Index(fields=['requested_at', 'status']),
             models.Index(fields=['dispatch_number']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(
+                fields=['status'],
+                include=['ambulance', 'priority', 'created_at', 'estimated_pickup_time', 'estimated_arrival_time'],
+                condition=models.Q(status__in=ACTIVE_DISPATCH_STATUSES),
+                name='dispatch_active_idx',
+            ),
         ]
 
+    # Timestamp column stamped when a dispatch enters each status
+    STATUS_TIMESTAMP_FIELDS = {
+        'dispatched': 'dispatched_at',
+        'en_route_pickup': 'en_route_at',
+        'on_scene': 'on_scene_at',
+        'patient_loaded': 'patient_loaded_at',
+        'at_hospital': 'at_hospital_at',
+        'completed': 'completed_at',
+    }
+
     def save(self, *args, **kwargs):
         # Generate dispatch number if not set
         if not self.dispatch_number:
-            from django.utils.crypto import get_random_string
             self.dispatch_number = f"DISP-{timezone.now().strftime('%Y%m%d')}-{get_random_string(6, '0123456789')}"
 
+        # A partial save only recomputes the durations whose timestamps it writes
+        update_fields = kwargs.get('update_fields')
+        written = None if update_fields is None else set(update_fields)
+
         # Auto-calculate response time
-        if self.dispatched_at and self.on_scene_at:
+        if self.dispatched_at and self.on_scene_at and (written is None or written & {'dispatched_at', 'on_scene_at'}):
             self.response_time_minutes = int((self.on_scene_at - self.dispatched_at).total_seconds() / 60)
+            if written is not None:
+                written.add('response_time_minutes')
 
         # Auto-calculate transport time
-        if self.patient_loaded_at and self.at_hospital_at:
+        if self.patient_loaded_at and self.at_hospital_at and (written is None or written & {'patient_loaded_at', 'at_hospital_at'}):
             self.transport_time_minutes = int((self.at_hospital_at - self.patient_loaded_at).total_seconds() / 60)
+            if written is not None:
+                written.add('transport_time_minutes')
 
+        if written is not None:
+            kwargs['update_fields'] = written
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.dispatch_number} - {self.ambulance} ({self.get_status_display()})"
+        # Label the ambulance only when it is already loaded, rather than fetching it per row
+        ambulance = self.ambulance if Dispatch.ambulance.is_cached(self) else self.ambulance_id
+        return f"{self.dispatch_number} - {ambulance} ({self.STATUS_DISPLAY.get(self.status, self.status)})"
 
     @property
     def total_time(self):
@@ -413,20 +651,14 @@ class Dispatch(BaseModel):
 
         # Set appropriate timestamps
         now = timezone.now()
-        if new_status == 'dispatched':
-            self.dispatched_at = now
-        elif new_status == 'en_route_pickup':
-            self.en_route_at = now
-        elif new_status == 'on_scene':
-            self.on_scene_at = now
-        elif new_status == 'patient_loaded':
-            self.patient_loaded_at = now
-        elif new_status == 'at_hospital':
-            self.at_hospital_at = now
-        elif new_status == 'completed':
-            self.completed_at = now
-
-        self.save()
+        update_fields = ['status', 'updated_at']
+        timestamp_field = self.STATUS_TIMESTAMP_FIELDS.get(new_status)
+        if timestamp_field:
+            setattr(self, timestamp_field, now)
+            update_fields.append(timestamp_field)
+
+        # Write only the columns the transition touched, not the whole row
+        self.save(update_fields=update_fields)
 
         # Create status history record
         DispatchStatusHistory.objects.create(
@@ -482,7 +714,7 @@ class GPSTrackingLog(BaseModel):
     heading = models.FloatField(_('Heading (degrees)'), default=0.0)
     altitude = models.FloatField(_('Altitude (m)'), null=True, blank=True)
     accuracy = models.FloatField(_('GPS Accuracy (m)'), null=True, blank=True)
-    timestamp = models.DateTimeField(_('Timestamp'), auto_now_add=True)
+    timestamp = models.DateTimeField(_('Timestamp'), default=timezone.now)
 
     class Meta:
         verbose_name = _('GPS Tracking Log')
@@ -528,6 +760,19 @@ class MaintenanceRecord(BaseModel):
         return f"{self.ambulance} - {self.get_maintenance_type_display()} ({self.service_date.date()})"
 
 
+class EquipmentInventoryQuerySet(models.QuerySet):
+    """Equipment inventory queries that run in the database"""
+
+    def with_expiry_flag(self):
+        """Annotate expired, read back by EquipmentInventory.is_expired"""
+        return self.annotate(
+            expired=ExpressionWrapper(
+                Q(expiry_date__isnull=False, expiry_date__lte=Now()),
+                output_field=models.BooleanField(),
+            )
+        )
+
+
 class EquipmentInventory(BaseModel):
     """Equipment inventory for ambulances"""
 
@@ -552,6 +797,8 @@ class EquipmentInventory(BaseModel):
     checked_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     notes = models.TextField(_('Notes'), blank=True)
 
+    objects = EquipmentInventoryQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Equipment Inventory')
         verbose_name_plural = _('Equipment Inventories')
@@ -562,6 +809,8 @@ class EquipmentInventory(BaseModel):
 
     @property
     def is_expired(self):
+        if 'expired' in self.__dict__:
+            return self.expired
         if self.expiry_date:
             return self.expiry_date <= timezone.now().date()
         return False
@@ -587,6 +836,14 @@ class FuelLog(BaseModel):
         verbose_name = _('Fuel Log')
         verbose_name_plural = _('Fuel Logs')
         ordering = ['-created_at']
+        constraints = [
+            # A receipt is logged once per ambulance; logs without a receipt are not constrained
+            models.UniqueConstraint(
+                fields=['ambulance', 'receipt_number'],
+                condition=~models.Q(receipt_number=''),
+                name='fuellog_unique_receipt'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.ambulance} - {self.fuel_amount}L ({self.created_at.date()})"
@@ -825,13 +1082,18 @@ class EmergencyCall(BaseModel):
             models.Index(fields=['status', 'priority']),
             models.Index(fields=['received_at']),
             models.Index(fields=['caller_phone']),
+            models.Index(
+                fields=['status'],
+                include=['received_at'],
+                condition=models.Q(status__in=OPEN_CALL_STATUSES),
+                name='emergencycall_open_idx',
+            ),
         ]
 
     def save(self, *args, **kwargs):
         # Generate call number if not set
         if not self.call_number:
             today = timezone.now().strftime('%Y%m%d')
-            from django.utils.crypto import get_random_string
             self.call_number = f"EC-{today}-{get_random_string(6, '0123456789')}"
 
         super().save(*args, **kwargs)
@@ -1108,8 +1370,6 @@ class GPSTrackingEnhanced(BaseModel):
             ).first()
 
         if previous_point:
-            import math
-
             # Haversine formula for distance calculation
             lat1, lon1 = math.radians(previous_point.latitude), math.radians(previous_point.longitude)
             lat2, lon2 = math.radians(self.latitude), math.radians(self.longitude)
@@ -1120,10 +1380,7 @@ class GPSTrackingEnhanced(BaseModel):
             a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
             c = 2 * math.asin(math.sqrt(a))
 
-            # Earth's radius in kilometers
-            r = 6371
-
-            return r * c
+            return _EARTH_R_KM * c
         return 0.0
 
     def __str__(self):
@@ -1179,8 +1436,6 @@ class GeofenceZone(BaseModel):
 
     def is_point_inside(self, latitude, longitude):
         """Check if a GPS point is inside this geofence zone"""
-        import math
-
         # Calculate distance from center
         lat1, lon1 = math.radians(self.center_latitude), math.radians(self.center_longitude)
         lat2, lon2 = math.radians(latitude), math.radians(longitude)
@@ -1191,9 +1446,7 @@ class GeofenceZone(BaseModel):
         a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
         c = 2 * math.asin(math.sqrt(a))
 
-        # Earth's radius in meters
-        r = 6371000
-        distance_meters = r * c
+        distance_meters = _EARTH_R_KM * 1000 * c
 
         return distance_meters <= self.radius_meters
 
@@ -1268,8 +1521,6 @@ class TrafficCondition(BaseModel):
 
     def affects_route(self, route_points):
         """Check if this traffic condition affects a given route"""
-        import math
-
         for point in route_points:
             lat, lon = point['lat'], point['lng']
 
@@ -1283,7 +1534,7 @@ class TrafficCondition(BaseModel):
             a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
             c = 2 * math.asin(math.sqrt(a))
 
-            distance_meters = 6371000 * c
+            distance_meters = _EARTH_R_KM * 1000 * c
 
             if distance_meters <= self.radius_meters:
                 return True
@@ -1291,4 +1542,25 @@ class TrafficCondition(BaseModel):
         return False
 
     def __str__(self):
-        return f"{self.get_condition_type_display()} - {self.get_severity_display()} at {self.latitude}, {self.longitude}"
\ No newline at end of file
+        return f"{self.get_condition_type_display()} - {self.get_severity_display()} at {self.latitude}, {self.longitude}"
+
+
+@receiver([post_save, post_delete], sender=AmbulanceType)
+def invalidate_ambulance_type_choices(sender, **kwargs):
+    """Drop the cached ambulance type options when a type changes"""
+    cache.delete(ACTIVE_AMBULANCE_TYPES_CACHE_KEY)
+
+
+@receiver([post_save, post_delete], sender=AmbulanceStation)
+def invalidate_station_choices(sender, **kwargs):
+    """Drop the cached station options when a station changes"""
+    cache.delete(ACTIVE_STATIONS_CACHE_KEY)
+
+
+@receiver([post_save, post_delete], sender=Ambulance)
+def invalidate_ambulance_choices(sender, update_fields=None, **kwargs):
+    """Drop the cached ambulance options when an ambulance label changes"""
+    # Location and status saves name their update_fields and never touch the label
+    if update_fields and not {'license_plate', 'ambulance_type', 'is_active'} & set(update_fields):
+        return
+    cache.delete(ACTIVE_AMBULANCES_CACHE_KEY)
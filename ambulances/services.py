@@ -7,25 +7,51 @@ import asyncio
 import json
 import logging
 import math
+import orjson
 import requests
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from django.conf import settings
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Count, F, Q
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from asgiref.sync import async_to_sync, sync_to_async
 
 from .models import (
     Ambulance, Dispatch, GPSTrackingLog, RouteOptimization, 
-    TrafficCondition, GeofenceZone
+    TrafficCondition, GeofenceZone, ACTIVE_DISPATCH_STATUSES
 )
 
 logger = logging.getLogger(__name__)
 channel_layer = get_channel_layer()
 
+# Outgoing payloads may carry naive datetimes from the GPS feed; treat them as UTC
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_UUID
+
+# Redis keys for the live GPS buffer (only used when the default cache is Redis)
+GPS_POSITIONS_KEY = 'amb:positions'
+GPS_STREAM_KEY = 'gps:stream'
+GPS_STREAM_GROUP = 'gps-flush'
+GPS_STREAM_CONSUMER = 'gps-flush-worker'
+GPS_FLUSH_BATCH_SIZE = 500
+# Approximate cap on buffered points if the flush falls behind
+GPS_STREAM_MAXLEN = 100000
+
+# Minimum seconds between dispatch center broadcasts for one ambulance
+GPS_BROADCAST_INTERVAL = 1
+
+# Search radius and candidate count for nearest-ambulance lookups
+NEAREST_AMBULANCE_RADIUS_KM = 50
+NEAREST_AMBULANCE_CANDIDATES = 10
+
+# Encoded fleet snapshot shared by every dispatch center socket
+FLEET_STATUS_CACHE_KEY = 'fleet:ambulance_status'
+FLEET_STATUS_CACHE_TIMEOUT = 3  # seconds
+
 
 @dataclass
 class GPSLocation:
@@ -72,11 +98,16 @@ class GPSTrackingService:
                 logger.error(f"Ambulance {ambulance_id} not found")
                 return False
             
-            # Update ambulance location
-            await self._update_ambulance_position(ambulance, location)
-            
-            # Create GPS tracking log
-            await self._create_gps_log(ambulance, location)
+            redis_client = get_redis_client()
+            if redis_client is not None:
+                # Buffer the point in Redis; flush_gps_buffer() persists it in batches
+                await sync_to_async(buffer_gps_location)(redis_client, ambulance.id, location)
+            else:
+                # Update ambulance location
+                await self._update_ambulance_position(ambulance, location)
+                
+                # Create GPS tracking log
+                await self._create_gps_log(ambulance, location)
             
             # Check geofences
             await self._check_geofences(ambulance, location)
@@ -95,7 +126,6 @@ class GPSTrackingService:
     
     async def _get_ambulance(self, ambulance_id: str):
         """Get ambulance object asynchronously"""
-        from django.db import sync_to_async
         try:
             return await sync_to_async(Ambulance.objects.get)(id=ambulance_id)
         except Ambulance.DoesNotExist:
@@ -103,8 +133,6 @@ class GPSTrackingService:
     
     async def _update_ambulance_position(self, ambulance, location: GPSLocation):
         """Update ambulance position in database"""
-        from django.db import sync_to_async
-        
         ambulance.current_latitude = location.latitude
         ambulance.current_longitude = location.longitude
         ambulance.speed = location.speed
@@ -117,13 +145,9 @@ class GPSTrackingService:
     
     async def _create_gps_log(self, ambulance, location: GPSLocation):
         """Create GPS tracking log entry"""
-        from django.db import sync_to_async
-        
         # Get active dispatch
         dispatch = await sync_to_async(
-            lambda: ambulance.dispatches.filter(status__in=[
-                'dispatched', 'en_route_pickup', 'on_scene', 'patient_loaded', 'en_route_hospital'
-            ]).first()
+            lambda: ambulance.dispatches.filter(status__in=ACTIVE_DISPATCH_STATUSES).first()
         )()
         
         await sync_to_async(GPSTrackingLog.objects.create)(
@@ -139,8 +163,6 @@ class GPSTrackingService:
     
     async def _check_geofences(self, ambulance, location: GPSLocation):
         """Check if ambulance entered/exited geofences"""
-        from django.db import sync_to_async
-        
         geofences = await sync_to_async(list)(
             GeofenceZone.objects.filter(is_active=True)
         )
@@ -200,26 +222,33 @@ class GPSTrackingService:
                     'speed': location.speed,
                     'heading': location.heading,
                     'accuracy': location.accuracy,
-                    'timestamp': location.timestamp.isoformat()
+                    'timestamp': location.timestamp
                 },
                 'status': ambulance.status
             }
+            # Encode once; consumers splice the bytes into their envelope
+            payload = orjson.dumps(location_data, option=ORJSON_OPTIONS)
             
             # Broadcast to ambulance-specific group
             await channel_layer.group_send(
                 f"ambulance_{ambulance.id}",
                 {
                     "type": "gps_location_update",
-                    "message": location_data
+                    "payload": payload
                 }
             )
             
+            # Coalesce dispatch center fan-out to one update per ambulance per
+            # interval; skipped points are still in the live position store
+            if not await cache.aadd(f"gps:gate:{ambulance.id}", 1, GPS_BROADCAST_INTERVAL):
+                return
+            
             # Broadcast to dispatch center group
             await channel_layer.group_send(
                 "dispatch_center",
                 {
                     "type": "ambulance_location_update",
-                    "message": location_data
+                    "payload": payload
                 }
             )
             
@@ -228,4 +257,192 @@ class GPSTrackingService:
 
 
 # Service instances
-gps_service = GPSTrackingService()
\ No newline at end of file
+gps_service = GPSTrackingService()
+
+
+def get_redis_client():
+    """Return the redis-py client behind the default cache, or None if it isn't Redis"""
+    try:
+        return cache._cache.get_client(write=True)
+    except AttributeError:
+        return None
+
+
+def find_nearby_ambulances(latitude: float, longitude: float,
+                           radius_km: float = NEAREST_AMBULANCE_RADIUS_KM,
+                           count: int = NEAREST_AMBULANCE_CANDIDATES) -> Optional[List[Tuple[str, float]]]:
+    """Nearest ambulances to a point as (ambulance_id, distance_km), closest first
+
+    Answers from the live Redis GEO index. Returns None when Redis is not
+    configured or holds no positions yet, so callers can fall back to the
+    database.
+    """
+    redis_client = get_redis_client()
+    if redis_client is None or not redis_client.exists(GPS_POSITIONS_KEY):
+        return None
+
+    results = redis_client.geosearch(
+        GPS_POSITIONS_KEY,
+        longitude=longitude,
+        latitude=latitude,
+        radius=radius_km,
+        unit='km',
+        sort='ASC',
+        count=count,
+        withdist=True
+    )
+    return [(member.decode(), distance) for member, distance in results]
+
+
+def buffer_gps_location(redis_client, ambulance_id, location: GPSLocation):
+    """Store the live position in Redis and queue the point for flush_gps_buffer()"""
+    ambulance_id = str(ambulance_id)
+    point = {
+        'latitude': location.latitude,
+        'longitude': location.longitude,
+        'speed': location.speed,
+        'heading': location.heading,
+        'accuracy': location.accuracy,
+        'timestamp': location.timestamp.isoformat()
+    }
+    
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.geoadd(GPS_POSITIONS_KEY, (location.longitude, location.latitude, ambulance_id))
+    pipe.hset(f"amb:{ambulance_id}", mapping=point)
+    pipe.xadd(
+        GPS_STREAM_KEY, {'ambulance_id': ambulance_id, **point},
+        maxlen=GPS_STREAM_MAXLEN, approximate=True
+    )
+    pipe.execute()
+
+
+def flush_gps_buffer(batch_size: int = GPS_FLUSH_BATCH_SIZE) -> int:
+    """Persist GPS points buffered in the Redis stream to GPSTrackingLog"""
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return 0
+    
+    from redis.exceptions import ResponseError
+    try:
+        redis_client.xgroup_create(GPS_STREAM_KEY, GPS_STREAM_GROUP, id='0', mkstream=True)
+    except ResponseError:
+        pass  # Consumer group already exists
+    
+    flushed = 0
+    # Entries left pending by a failed flush come first, then new ones
+    for start_id in ('0', '>'):
+        while True:
+            response = redis_client.xreadgroup(
+                GPS_STREAM_GROUP, GPS_STREAM_CONSUMER, {GPS_STREAM_KEY: start_id}, count=batch_size
+            )
+            entries = response[0][1] if response else []
+            if not entries:
+                break
+            
+            points = [
+                {key.decode(): value.decode() for key, value in fields.items()}
+                for _, fields in entries if fields
+            ]
+            # Points for ambulances deleted since the ping would fail the whole batch
+            existing = {
+                str(ambulance_id) for ambulance_id in Ambulance.objects.filter(
+                    id__in={point['ambulance_id'] for point in points}
+                ).values_list('id', flat=True)
+            }
+            points = [point for point in points if point['ambulance_id'] in existing]
+            active_dispatches = {
+                str(ambulance_id): dispatch_id
+                for ambulance_id, dispatch_id in Dispatch.objects.filter(
+                    ambulance_id__in=existing,
+                    status__in=ACTIVE_DISPATCH_STATUSES
+                ).values_list('ambulance_id', 'id')
+            }
+            
+            logs = []
+            latest = {}
+            for point in points:
+                log = GPSTrackingLog(
+                    ambulance_id=point['ambulance_id'],
+                    dispatch_id=active_dispatches.get(point['ambulance_id']),
+                    latitude=float(point['latitude']),
+                    longitude=float(point['longitude']),
+                    speed=float(point['speed']),
+                    heading=float(point['heading']),
+                    accuracy=float(point['accuracy']),
+                    timestamp=parse_datetime(point['timestamp'])
+                )
+                logs.append(log)
+                latest[point['ambulance_id']] = log
+            
+            with transaction.atomic():
+                GPSTrackingLog.objects.bulk_create(logs, batch_size=batch_size)
+                Ambulance.objects.bulk_update(
+                    [
+                        Ambulance(
+                            id=ambulance_id,
+                            current_latitude=log.latitude,
+                            current_longitude=log.longitude,
+                            speed=log.speed,
+                            heading=log.heading,
+                            last_gps_update=log.timestamp
+                        )
+                        for ambulance_id, log in latest.items()
+                    ],
+                    ['current_latitude', 'current_longitude', 'speed', 'heading', 'last_gps_update']
+                )
+            
+            entry_ids = [entry_id for entry_id, _ in entries]
+            redis_client.xack(GPS_STREAM_KEY, GPS_STREAM_GROUP, *entry_ids)
+            redis_client.xdel(GPS_STREAM_KEY, *entry_ids)
+            flushed += len(logs)
+    
+    return flushed
+
+
+def get_fleet_status() -> List[Dict]:
+    """Get ambulance data for dispatch center"""
+    rows = Ambulance.objects.filter(is_active=True).annotate(
+        crew_count=Count('ambulancecrew', filter=Q(ambulancecrew__is_active=True)),
+        type_name=F('ambulance_type__name')
+    ).values(
+        'id', 'license_plate', 'status', 'current_latitude', 'current_longitude',
+        'last_gps_update', 'crew_count', 'type_name'
+    )
+    return [
+        {
+            'id': row['id'],
+            'license_plate': row['license_plate'],
+            'status': row['status'],
+            'location': {
+                'latitude': row['current_latitude'],
+                'longitude': row['current_longitude']
+            } if row['current_latitude'] and row['current_longitude'] else None,
+            'last_update': row['last_gps_update'],
+            'crew_count': row['crew_count'],
+            'ambulance_type': row['type_name']
+        }
+        for row in rows
+    ]
+
+
+def build_fleet_status_message() -> bytes:
+    """Encode the fleet status message once and cache it for all dispatchers"""
+    message = orjson.dumps({
+        'type': 'ambulance_status',
+        'data': get_fleet_status()
+    }, option=ORJSON_OPTIONS)
+    cache.set(FLEET_STATUS_CACHE_KEY, message, FLEET_STATUS_CACHE_TIMEOUT)
+    return message
+
+
+def broadcast_fleet_status():
+    """Push a fresh fleet snapshot to every connected dispatcher"""
+    message = build_fleet_status_message()
+    if channel_layer:
+        async_to_sync(channel_layer.group_send)(
+            "dispatch_center",
+            {
+                "type": "fleet_status_snapshot",
+                "payload": message
+            }
+        )
@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from .services import broadcast_fleet_status, flush_gps_buffer
+
+
+@shared_task
+def push_fleet_status():
+    broadcast_fleet_status()
+
+
+@shared_task
+def flush_gps_points():
+    return flush_gps_buffer()
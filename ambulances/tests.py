@@ -1,16 +1,28 @@
-from django.test import TestCase, Client
+from django.test import SimpleTestCase, TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.db import connection
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 # GIS functionality removed - using standard latitude/longitude fields
 # from django.contrib.gis.geos import Point
 from django.utils import timezone
 from datetime import timedelta
+from io import StringIO
+from unittest import mock
 import json
 
+import fakeredis
+
 from .models import (
-    Ambulance, AmbulanceType, AmbulanceStation, Dispatch,
+    Ambulance, AmbulanceCrew, AmbulanceType, AmbulanceStation, Dispatch,
     GPSTrackingLog, MaintenanceRecord, EquipmentInventory
 )
+from . import services
+from .services import (
+    GPS_STREAM_CONSUMER, GPS_STREAM_GROUP, GPS_STREAM_KEY,
+    GPSLocation, buffer_gps_location, flush_gps_buffer, get_fleet_status
+)
 from referrals.models import Referral
 from patients.models import Patient
 from doctors.models import DoctorProfile, Hospital
@@ -98,4 +110,237 @@ class AmbulanceModelTest(TestCase):
 
         # Set next maintenance to future date
         self.ambulance.next_maintenance = timezone.now() + timedelta(days=30)
-        self.assertFalse(self.ambulance.needs_maintenance)
\ No newline at end of file
+        self.assertFalse(self.ambulance.needs_maintenance)
+
+
+class ConsumerEnvelopeTest(SimpleTestCase):
+    """Test cases for pre-encoded WebSocket event envelopes"""
+
+    def test_envelope_prefix_wraps_pre_encoded_payload(self):
+        """Spliced payloads produce the same JSON as encoding the envelope"""
+        from .consumers import envelope_prefix
+
+        payload = json.dumps({'ambulance_id': 'abc', 'status': 'available'}).encode()
+        message = envelope_prefix('ambulance_location_update') + payload + b'}'
+
+        self.assertEqual(json.loads(message), {
+            'type': 'ambulance_location_update',
+            'data': {'ambulance_id': 'abc', 'status': 'available'}
+        })
+
+
+class GPSPayloadValidationTest(SimpleTestCase):
+    """Test cases for the GPS ping fast-path validator"""
+
+    def test_valid_payload_is_cleaned(self):
+        """Numeric strings are coerced and missing optional fields are None"""
+        from .forms import validate_gps_payload
+
+        cleaned = validate_gps_payload({
+            'ambulance_id': '12345678-1234-5678-1234-567812345678',
+            'latitude': '-1.2921',
+            'longitude': 36.8219,
+            'speed': 40,
+        })
+
+        self.assertEqual(cleaned['latitude'], -1.2921)
+        self.assertEqual(cleaned['speed'], 40.0)
+        self.assertIsNone(cleaned['heading'])
+
+    def test_out_of_range_latitude_is_rejected(self):
+        """Bounds match GPSUpdateForm"""
+        from django.core.exceptions import ValidationError
+        from .forms import validate_gps_payload
+
+        with self.assertRaises(ValidationError) as ctx:
+            validate_gps_payload({
+                'ambulance_id': '12345678-1234-5678-1234-567812345678',
+                'latitude': 91,
+                'longitude': 0,
+            })
+        self.assertIn('latitude', ctx.exception.message_dict)
+
+
+class FleetStatusTest(TestCase):
+    """Test cases for the dispatch center fleet snapshot"""
+
+    def test_crew_count_skips_inactive_assignments(self):
+        """Only active AmbulanceCrew rows are counted"""
+        ambulance_type = AmbulanceType.objects.create(name="Basic Life Support", code="BLS")
+        ambulance = Ambulance.objects.create(
+            license_plate="AMB-301",
+            vehicle_identification_number="1HGBH41JXMN109301",
+            ambulance_type=ambulance_type,
+            make="Ford",
+            model="Transit",
+            year=2022,
+            color="White"
+        )
+        now = timezone.now()
+        for i, is_active in enumerate([True, False]):
+            AmbulanceCrew.objects.create(
+                ambulance=ambulance,
+                crew_member=User.objects.create_user(
+                    username=f'crew{i}', email=f'crew{i}@example.com', password='testpass123'
+                ),
+                role='emt',
+                shift_start=now,
+                shift_end=now + timedelta(hours=8),
+                is_active=is_active
+            )
+
+        self.assertEqual([row['crew_count'] for row in get_fleet_status()], [1])
+
+
+class GPSBufferFlushTest(TestCase):
+    """Test cases for flushing buffered GPS points to the database"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        ambulance_type = AmbulanceType.objects.create(name="Basic Life Support", code="BLS")
+        self.ambulance = Ambulance.objects.create(
+            license_plate="AMB-201",
+            vehicle_identification_number="1HGBH41JXMN109201",
+            ambulance_type=ambulance_type,
+            make="Ford",
+            model="Transit",
+            year=2022,
+            color="White"
+        )
+
+    def flush(self):
+        with mock.patch.object(services, 'get_redis_client', return_value=self.redis):
+            return flush_gps_buffer()
+
+    def test_flush_saves_buffered_points(self):
+        """Pending and new points are saved with their ping times; deleted ambulances are skipped"""
+        pinged = timezone.now() - timedelta(minutes=10)
+        buffer_gps_location(self.redis, self.ambulance.pk, GPSLocation(40.71, -74.00, timestamp=pinged))
+        # Deliver the first point without acking it, as a failed flush would
+        self.redis.xgroup_create(GPS_STREAM_KEY, GPS_STREAM_GROUP, id='0', mkstream=True)
+        self.redis.xreadgroup(GPS_STREAM_GROUP, GPS_STREAM_CONSUMER, {GPS_STREAM_KEY: '>'})
+        buffer_gps_location(
+            self.redis, self.ambulance.pk, GPSLocation(40.72, -74.01, timestamp=pinged + timedelta(minutes=1))
+        )
+        buffer_gps_location(self.redis, '00000000-0000-0000-0000-000000000000', GPSLocation(40.73, -74.02))
+
+        self.assertEqual(self.flush(), 2)
+        self.assertEqual(
+            list(GPSTrackingLog.objects.order_by('timestamp').values_list('latitude', 'timestamp')),
+            [(40.71, pinged), (40.72, pinged + timedelta(minutes=1))]
+        )
+        self.ambulance.refresh_from_db()
+        self.assertEqual(self.ambulance.current_latitude, 40.72)
+        self.assertEqual(self.ambulance.last_gps_update, pinged + timedelta(minutes=1))
+        self.assertEqual(self.redis.xlen(GPS_STREAM_KEY), 0)
+        self.assertEqual(self.flush(), 0)
+
+
+class SeedAmbulancesQueryCountTest(TestCase):
+    """Test cases for the seed_ambulances command"""
+
+    # Every step is a bulk insert, so the count must not grow with the rows seeded
+    MAX_QUERIES = 40
+
+    def test_seed_runs_in_bounded_queries(self):
+        """Seeding and re-seeding stay under a fixed query budget"""
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as ctx:
+                call_command('seed_ambulances', stdout=StringIO())
+            self.assertLess(len(ctx.captured_queries), self.MAX_QUERIES)
+
+        self.assertEqual(Ambulance.objects.count(), 10)
+        self.assertEqual(EquipmentInventory.objects.count(), 100)
+
+
+class DispatchBulkTransitionTest(TestCase):
+    """Test cases for Dispatch.objects.bulk_transition"""
+
+    def test_bulk_transition_matches_update_status(self):
+        """One UPDATE and one history INSERT cover every dispatch"""
+        call_command('seed_database', stdout=StringIO())
+        started = timezone.now() - timedelta(minutes=12)
+        Dispatch.objects.update(dispatched_at=started, on_scene_at=None, response_time_minutes=None)
+        ids = list(Dispatch.objects.values_list('id', flat=True))
+        old_statuses = dict(Dispatch.objects.values_list('id', 'status'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            moved = Dispatch.objects.bulk_transition(ids, 'on_scene')
+        writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(('UPDATE', 'INSERT'))]
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(moved, len(ids))
+        self.assertTrue(ids)
+
+        for dispatch in Dispatch.objects.all():
+            self.assertEqual(dispatch.status, 'on_scene')
+            self.assertIsNotNone(dispatch.on_scene_at)
+            self.assertEqual(dispatch.response_time_minutes, 12)
+            history = dispatch.status_history.get()
+            self.assertEqual(history.old_status, old_statuses[dispatch.pk])
+
+
+class AmbulanceDistanceTest(TestCase):
+    """Test cases for Ambulance distance helpers"""
+
+    def setUp(self):
+        ambulance_type = AmbulanceType.objects.create(name="Basic Life Support", code="BLS")
+        self.located = Ambulance.objects.create(
+            license_plate="AMB-101",
+            vehicle_identification_number="1HGBH41JXMN109101",
+            ambulance_type=ambulance_type,
+            make="Ford",
+            model="Transit",
+            year=2022,
+            color="White",
+            current_latitude=40.7128,
+            current_longitude=-74.0060
+        )
+        Ambulance.objects.create(
+            license_plate="AMB-102",
+            vehicle_identification_number="1HGBH41JXMN109102",
+            ambulance_type=ambulance_type,
+            make="Ford",
+            model="Transit",
+            year=2022,
+            color="White"
+        )
+
+    def test_bulk_distance_matches_single_distance(self):
+        """Bulk distances agree with calculate_distance_to and skip unlocated ambulances"""
+        distances = Ambulance.bulk_distance_to(40.7580, -73.9855)
+        self.assertEqual(list(distances), [self.located.pk])
+        self.assertAlmostEqual(
+            distances[self.located.pk], self.located.calculate_distance_to(40.7580, -73.9855)
+        )
+
+    def test_station_matrix_matches_bulk_distance(self):
+        """Each station row of the matrix equals bulk_distance_to from that station"""
+        station = AmbulanceStation.objects.create(
+            name="Central Station", code="CS01", address="123 Main St",
+            latitude=40.7580, longitude=-73.9855, phone="555-0123"
+        )
+        matrix = Ambulance.distance_matrix_to_stations()
+        self.assertEqual(
+            matrix, {station.pk: Ambulance.bulk_distance_to(40.7580, -73.9855, Ambulance.objects.all())}
+        )
+
+    def test_nearest_to_ranks_in_database(self):
+        """nearest_to annotates the Haversine distance and honours the radius"""
+        ranked = list(Ambulance.objects.nearest_to(40.7580, -73.9855))
+        self.assertEqual(ranked, [self.located])
+        self.assertAlmostEqual(ranked[0].distance_km, self.located.calculate_distance_to(40.7580, -73.9855))
+        self.assertFalse(Ambulance.objects.nearest_to(40.7580, -73.9855, radius_km=1).exists())
+
+    def test_status_flags_match_properties(self):
+        """with_status_flags agrees with the Python fallbacks"""
+        Ambulance.objects.filter(pk=self.located.pk).update(
+            fuel_level=30, next_maintenance=timezone.now() - timedelta(days=1)
+        )
+        for ambulance in Ambulance.objects.with_status_flags():
+            self.assertIn('fuel_band', ambulance.__dict__)
+            plain = Ambulance.objects.get(pk=ambulance.pk)
+            self.assertEqual(ambulance.fuel_status, plain.fuel_status)
+            self.assertEqual(ambulance.needs_maintenance, plain.needs_maintenance)
+        self.assertEqual(
+            Ambulance.objects.with_status_flags().filter(maintenance_due=True).get(), self.located
+        )
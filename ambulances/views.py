@@ -13,6 +13,7 @@ from django.views.decorators.http import require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.core.serializers import serialize
 from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.conf import settings
 import json
 import logging
@@ -24,9 +25,10 @@ from asgiref.sync import async_to_sync
 from .models import (
     Ambulance, Dispatch, AmbulanceType, AmbulanceStation, AmbulanceCrew,
     DispatchCrew, GPSTrackingLog, MaintenanceRecord, EquipmentInventory,
-    FuelLog, IncidentReport, PerformanceMetrics
+    FuelLog, IncidentReport, PerformanceMetrics, ACTIVE_DISPATCH_STATUSES
 )
-from .forms import AmbulanceForm, DispatchForm, AmbulanceSearchForm, GPSUpdateForm, MaintenanceForm
+from .forms import AmbulanceForm, DispatchForm, AmbulanceSearchForm, GPSUpdateForm, MaintenanceForm, validate_gps_payload
+from .services import find_nearby_ambulances
 from referrals.models import Referral
 
 logger = logging.getLogger(__name__)
@@ -66,27 +68,39 @@ def find_nearest_ambulance(pickup_lat, pickup_lng, priority='routine'):
         current_longitude__isnull=False
     )
 
-    # Calculate distances and find nearest
-    nearest_ambulance = None
-    min_distance = float('inf')
-
-    for ambulance in available_ambulances:
-        distance = ambulance.calculate_distance_to(pickup_lat, pickup_lng)
-        if distance and distance < min_distance:
-            min_distance = distance
-            nearest_ambulance = ambulance
+    # Prefer the live Redis GEO index; only its nearest candidates are loaded
+    nearby = find_nearby_ambulances(pickup_lat, pickup_lng)
+    if nearby:
+        distances = dict(nearby)
+        candidates = sorted(
+            available_ambulances.filter(id__in=distances).select_related('ambulance_type'),
+            key=lambda ambulance: distances[str(ambulance.id)]
+        )
+        if candidates:
+            nearest_ambulance = candidates[0]
+            if priority in ['emergency', 'critical']:
+                max_distance = distances[str(nearest_ambulance.id)] * 1.5
+                for ambulance in candidates:
+                    if (distances[str(ambulance.id)] < max_distance and
+                            'advanced' in ambulance.ambulance_type.name.lower()):
+                        return ambulance
+            return nearest_ambulance
+
+    # Rank by distance in the database and load only the ambulance returned
+    ranked = available_ambulances.nearest_to(pickup_lat, pickup_lng)
+    nearest_ambulance = ranked.first()
+    if nearest_ambulance is None:
+        return None
 
     # For emergency calls, prioritize ambulances with advanced equipment
     if priority in ['emergency', 'critical']:
-        advanced_ambulances = available_ambulances.filter(
-            ambulance_type__name__icontains='advanced'
-        )
-        if advanced_ambulances.exists():
-            # Find nearest advanced ambulance
-            for ambulance in advanced_ambulances:
-                distance = ambulance.calculate_distance_to(pickup_lat, pickup_lng)
-                if distance and distance < min_distance * 1.5:  # Allow 50% more distance for advanced ambulance
-                    return ambulance
+        advanced_ambulance = ranked.filter(
+            ambulance_type__name__icontains='advanced',
+            # Allow 50% more distance for advanced ambulance
+            distance_km__lt=nearest_ambulance.distance_km * 1.5
+        ).first()
+        if advanced_ambulance:
+            return advanced_ambulance
 
     return nearest_ambulance
 
@@ -170,7 +184,7 @@ def real_time_dashboard(request):
     # Get active dispatches
     active_dispatches = Dispatch.objects.filter(
         status__in=['dispatched', 'en_route_pickup', 'on_scene', 'patient_loaded', 'en_route_hospital']
-    ).select_related('ambulance', 'referral__patient').prefetch_related('primary_crew')
+    ).for_list_view()
 
     # Get available ambulances
     available_ambulances = Ambulance.objects.filter(
@@ -214,39 +228,39 @@ def real_time_dashboard(request):
 def update_gps_location(request):
     """Update ambulance GPS location via AJAX"""
     try:
-        data = json.loads(request.body)
-        ambulance_id = data.get('ambulance_id')
-        latitude = float(data.get('latitude'))
-        longitude = float(data.get('longitude'))
-        speed = float(data.get('speed', 0))
-        heading = float(data.get('heading', 0))
-        accuracy = float(data.get('accuracy', 0))
-
-        ambulance = get_object_or_404(Ambulance, id=ambulance_id)
-
-        # Update ambulance location
-        ambulance.update_location(latitude, longitude, speed, heading)
-
-        # Log GPS tracking
-        gps_log = GPSTrackingLog.objects.create(
-            ambulance=ambulance,
+        data = validate_gps_payload(json.loads(request.body))
+        ambulance_id = data['ambulance_id']
+        latitude = data['latitude']
+        longitude = data['longitude']
+        speed = data['speed'] or 0
+        heading = data['heading'] or 0
+        accuracy = data['accuracy'] or 0
+
+        # Only the status goes into the broadcast below
+        ambulance = get_object_or_404(Ambulance.objects.only('id', 'status'), id=ambulance_id)
+        now = timezone.now()
+
+        Ambulance.objects.filter(pk=ambulance.pk).update(
+            current_latitude=latitude,
+            current_longitude=longitude,
+            speed=speed,
+            heading=heading,
+            last_gps_update=now
+        )
+        # Link the log to the active dispatch in the same INSERT
+        GPSTrackingLog.objects.create(
+            ambulance_id=ambulance.pk,
+            dispatch_id=Dispatch.objects.filter(
+                ambulance_id=ambulance.pk, status__in=ACTIVE_DISPATCH_STATUSES
+            ).values_list('id', flat=True).first(),
             latitude=latitude,
             longitude=longitude,
             speed=speed,
             heading=heading,
-            accuracy=accuracy
+            accuracy=accuracy,
+            timestamp=now
         )
 
-        # If ambulance is on active dispatch, update dispatch GPS log
-        active_dispatch = Dispatch.objects.filter(
-            ambulance=ambulance,
-            status__in=['dispatched', 'en_route_pickup', 'on_scene', 'patient_loaded', 'en_route_hospital']
-        ).first()
-
-        if active_dispatch:
-            gps_log.dispatch = active_dispatch
-            gps_log.save()
-
         # Broadcast location update via WebSocket
         if channel_layer:
             async_to_sync(channel_layer.group_send)(
@@ -258,7 +272,7 @@ def update_gps_location(request):
                     "longitude": longitude,
                     "speed": speed,
                     "heading": heading,
-                    "timestamp": timezone.now().isoformat(),
+                    "timestamp": now.isoformat(),
                     "status": ambulance.status
                 }
             )
@@ -268,6 +282,11 @@ def update_gps_location(request):
             'message': 'Location updated successfully'
         })
 
+    except ValidationError as e:
+        return JsonResponse({
+            'status': 'error',
+            'errors': e.message_dict
+        }, status=400)
     except Exception as e:
         logger.error(f"GPS update error: {str(e)}")
         return JsonResponse({
@@ -443,7 +462,7 @@ def dispatch_control_center(request):
     # Get all active dispatches
     active_dispatches = Dispatch.objects.filter(
         status__in=['requested', 'assigned', 'dispatched', 'en_route_pickup', 'on_scene', 'patient_loaded', 'en_route_hospital']
-    ).select_related('ambulance', 'referral__patient', 'dispatcher').prefetch_related('primary_crew')
+    ).for_list_view()
 
     # Get available ambulances with their locations
     available_ambulances = Ambulance.objects.filter(
@@ -631,9 +650,7 @@ class DispatchListView(LoginRequiredMixin, ListView):
     paginate_by = 20
     
     def get_queryset(self):
-        return super().get_queryset().select_related(
-            'ambulance', 'referral', 'dispatcher'
-        ).order_by('-estimated_arrival_time')
+        return super().get_queryset().for_list_view().order_by('-estimated_arrival_time')
 
 @login_required
 def update_dispatch_status(request, dispatch_id):
@@ -674,9 +691,7 @@ def ambulance_dashboard(request):
         'in_use_ambulances': Ambulance.objects.filter(status='in_use').count(),
         'maintenance_ambulances': Ambulance.objects.filter(status='under_maintenance').count(),
         'active_dispatches': Dispatch.objects.filter(status__in=['dispatched', 'en_route']).count(),
-        'recent_dispatches': Dispatch.objects.select_related(
-            'ambulance', 'referral', 'dispatcher'
-        ).order_by('-created_at')[:10],
+        'recent_dispatches': Dispatch.objects.for_list_view().order_by('-created_at')[:10],
         'urgent_dispatches': Dispatch.objects.filter(
             status__in=['requested', 'dispatched'],
             estimated_arrival_time__lte=datetime.now() + timedelta(hours=2)
@@ -16,6 +16,7 @@ from django.views.generic import ListView, DetailView
 from django.utils import timezone
 from django.db.models import Q, Avg, Max, Min
 from django.conf import settings
+from django.core.cache import cache
 import requests
 import time
 
@@ -24,6 +25,12 @@ from .models import (
     GeofenceZone, TrafficCondition, EmergencyCall
 )
 
+# Seconds a Directions result is reused; older traffic-based ETAs go stale
+ROUTE_CACHE_TIMEOUT = 300
+
+# Decimal places trip ends are snapped to for the cache key (about 100 m)
+ROUTE_CACHE_PRECISION = 3
+
 
 def is_dispatcher_or_admin(user):
     """Check if user is a dispatcher or admin"""
@@ -227,13 +234,36 @@ def optimize_route(request):
         }, status=400)
 
 
+def _route_cache_key(origin, destination, route_type):
+    """Cache key for a trip, with both 'lat,lng' ends snapped to a grid cell"""
+    def cell(point):
+        try:
+            return ','.join(f'{float(part):.{ROUTE_CACHE_PRECISION}f}' for part in point.split(','))
+        except ValueError:
+            return point
+    return f'route:{route_type}:{cell(origin)}:{cell(destination)}'
+
+
 def get_optimized_route(origin, destination, route_type='emergency'):
-    """Get optimized route from Google Maps API"""
+    """Get optimized route from Google Maps API, reusing recent results for the same trip"""
     
     api_key = getattr(settings, 'GOOGLE_MAPS_API_KEY', '')
     if not api_key:
         return None
     
+    # Re-routing asks for the same trip repeatedly; only successful lookups are kept
+    cache_key = _route_cache_key(origin, destination, route_type)
+    route_data = cache.get(cache_key)
+    if route_data is None:
+        route_data = _fetch_directions(origin, destination, route_type, api_key)
+        if route_data is not None:
+            cache.set(cache_key, route_data, ROUTE_CACHE_TIMEOUT)
+    return route_data
+
+
+def _fetch_directions(origin, destination, route_type, api_key):
+    """Call the Directions API and reduce its response to the route fields we store"""
+    
     # Configure route parameters based on type
     avoid_params = []
     if route_type == 'avoid_traffic':
@@ -0,0 +1,13 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_ereferral.settings')
+
+app = Celery('hospital_ereferral')
+
+# Read CELERY_* settings, including CELERY_BEAT_SCHEDULE, from Django settings
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Pick up tasks.py from every installed app
+app.autodiscover_tasks()
@@ -112,9 +112,19 @@ if DATABASE_URL and 'postgresql' in DATABASE_URL:
     DATABASES['default']['ENGINE'] = 'django.db.backends.postgresql'
     DATABASES['default']['OPTIONS'] = {'sslmode': 'prefer'}
 
-# Database connection pooling for production
-if not DEBUG:
-    DATABASES['default']['CONN_MAX_AGE'] = 60
+# Persistent database connections. Channels consumers run every
+# database_sync_to_async call on a worker thread, so without reuse each
+# WebSocket query would pay a fresh connection handshake.
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# pgbouncer in transaction pooling mode cannot keep server-side cursors open
+if os.getenv('DB_USE_PGBOUNCER', 'False').lower() == 'true':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# The covering indexes on Dispatch and EmergencyCall use INCLUDE, which Postgres
+# supports; SQLite just builds them without the extra columns
+SILENCED_SYSTEM_CHECKS = ['models.W040']
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -374,6 +384,18 @@ CELERY_TASK_REJECT_ON_WORKER_LOST = True
 CELERY_TASK_ACKS_LATE = True
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 
+# Periodic pushes to dispatch center WebSockets
+CELERY_BEAT_SCHEDULE = {
+    'push-fleet-status': {
+        'task': 'ambulances.tasks.push_fleet_status',
+        'schedule': 3.0,  # seconds, matches the fleet snapshot cache TTL
+    },
+    'flush-gps-points': {
+        'task': 'ambulances.tasks.flush_gps_points',
+        'schedule': 5.0,
+    },
+}
+
 # Additional Security Headers
 if not DEBUG:
     SECURE_CROSS_ORIGIN_OPENER_POLICY = 'same-origin'